@@ -0,0 +1,537 @@
+# -*- coding: utf-8 -*-
+#
+# Banco de pruebas sin interfaz gráfica para el camino crítico del traductor:
+# captura -> OCR -> tamaño de fuente -> traducción. El subcomando "captura" mide
+# aparte el rendimiento de cada motor de captura de pantalla (en Linux puede
+# arrancar su propio Xvfb).
+#
+# Las capturas salen de imágenes grabadas (fixtures) en lugar de la pantalla, y las
+# traducciones van a un servidor local que imita la API de Ollama con una latencia
+# configurable. Los resultados (p50/p95/p99 por etapa, fotogramas por segundo y
+# memoria máxima) se guardan en JSON para comparar versiones.
+#
+# Uso:
+#   python benchmark_traductor.py pipeline CARPETA_DE_CAPTURAS --salida resultados.json
+#   python benchmark_traductor.py pipeline CARPETA --comparar-con resultados_anteriores.json
+#   python benchmark_traductor.py captura --xvfb --salida captura.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+# --- Servidor que imita a Ollama ---
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    """
+    Responde a /api/version y /api/generate como lo haría Ollama. La latencia se
+    reparte entre la evaluación del prompt, el primer token y cada token
+    siguiente; con "stream" se envía NDJSON troceado igual que el servidor real.
+    Respeta num_predict y las secuencias de parada de "options".
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_chunk(self, data):
+        body = (json.dumps(data) + "\n").encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path in ("/api/version", "/api/tags"):
+            self.send_json({"version": "stub"})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/api/generate":
+            self.send_error(404)
+            return
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.requests_served += 1
+        if not payload.get("prompt"):
+            # Petición de precarga del modelo
+            self.send_json({"model": payload.get("model"), "response": "", "done": True})
+            return
+
+        options = payload.get("options", {})
+        tokens = self.server.make_tokens(payload["prompt"], chatty=not payload.get("system"))
+        tokens = apply_stop_sequences(tokens, options.get("stop", []))
+        if options.get("num_predict", -1) >= 0:
+            tokens = tokens[:options["num_predict"]]
+        prompt_eval_count = self.server.evaluate_prompt(payload)
+        self.server.count_tokens(prompt_eval_count, len(tokens))
+
+        time.sleep(self.server.first_token_latency + self.server.prompt_token_latency * prompt_eval_count)
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for token in tokens:
+                self.send_chunk({"response": token, "done": False})
+                time.sleep(self.server.token_latency)
+            self.send_chunk({"response": "", "done": True, "eval_count": len(tokens), "prompt_eval_count": prompt_eval_count})
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            time.sleep(self.server.token_latency * len(tokens))
+            self.send_json({"response": "".join(tokens), "done": True, "eval_count": len(tokens),
+                            "prompt_eval_count": prompt_eval_count})
+
+def apply_stop_sequences(tokens, stop_sequences):
+    """Corta la respuesta antes de la primera secuencia de parada, como hace Ollama."""
+    text = "".join(tokens)
+    cut = min((text.find(stop) for stop in stop_sequences if stop and stop in text), default=-1)
+    if cut < 0:
+        return tokens
+    kept = []
+    length = 0
+    for token in tokens:
+        if length + len(token) > cut:
+            if cut > length:
+                kept.append(token[:cut - length])
+            break
+        kept.append(token)
+        length += len(token)
+    return kept
+
+class StubOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    # Lo que añade un modelo hablador sin instrucciones de sistema ni secuencias de parada
+    CHATTY_NOTE = ("\n\nNota: he adaptado el registro coloquial del original al español neutro "
+                   "y he mantenido los nombres propios sin traducir.")
+
+    def __init__(self, first_token_latency=0.2, token_latency=0.02, port=0, prompt_token_latency=0.002):
+        super().__init__(("127.0.0.1", port), StubOllamaHandler)
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.prompt_token_latency = prompt_token_latency
+        self.requests_served = 0
+        self.tokens_generated = 0
+        self.prompt_tokens_evaluated = 0
+        self.last_prompt_tokens = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def make_tokens(self, prompt, chatty=False):
+        """
+        Genera una "traducción" de tantas palabras como el texto que la acompaña;
+        si chatty, seguida de una nota que el traductor acabaría descartando. Un
+        prompt agrupado ([1] ..., [2] ...) se responde con un segmento numerado por línea.
+        """
+        segments = [match for match in map(traductor.BATCH_SEGMENT_PATTERN.match, prompt.splitlines()) if match]
+        if segments:
+            tokens = []
+            for segment in segments:
+                tokens.append(f"[{segment.group(1)}] ")
+                tokens += [f"trad_{word} " for word in segment.group(2).split()]
+                tokens[-1] = tokens[-1].rstrip() + "\n"
+        else:
+            tokens = [f"trad_{word} " for word in prompt.split()[-12:]]
+        if chatty:
+            tokens += [word + " " for word in self.CHATTY_NOTE.split(" ")]
+        return tokens
+
+    def evaluate_prompt(self, payload):
+        """
+        Tokens del prompt que habría que evaluar. Como Ollama, se reutiliza el
+        prefijo común con la petición anterior (el prompt de sistema, si es fijo).
+        """
+        prompt_tokens = (payload.get("system", "") + "\n" + payload["prompt"]).split()
+        with self.lock:
+            shared = 0
+            for previous, current in zip(self.last_prompt_tokens, prompt_tokens):
+                if previous != current:
+                    break
+                shared += 1
+            self.last_prompt_tokens = prompt_tokens
+        return len(prompt_tokens) - shared
+
+    def count_tokens(self, prompt_tokens, generated_tokens):
+        with self.lock:
+            self.prompt_tokens_evaluated += prompt_tokens
+            self.tokens_generated += generated_tokens
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="stub-ollama", daemon=True).start()
+        return self
+
+def use_stub_ollama(server):
+    """Redirige las peticiones a Ollama del traductor hacia el servidor simulado."""
+    traductor.OLLAMA_BASE_URL = server.base_url
+    traductor.OLLAMA_API_URL = f"{server.base_url}/api/generate"
+
+
+# --- Captura simulada a partir de imágenes grabadas ---
+class FixtureCaptureSource(traductor.CaptureBufferPool):
+    """
+    Sustituye a traductor.capture_buffers: en lugar de capturar la pantalla recorta
+    la imagen de la fixture activa, así capture_rois y capture_and_preprocess se
+    ejecutan con su código real.
+    """
+
+    name = "fixture"
+
+    def __init__(self):
+        super().__init__()
+        self.frame = None
+
+    def grab(self, bbox):
+        x1, y1, x2, y2 = bbox
+        region = self.frame[y1:y2, x1:x2]
+        buffer = self.acquire(region.shape)
+        np.copyto(buffer, region)
+        return buffer
+
+
+# --- Medición ---
+def peak_rss_mb():
+    """Memoria residente máxima del proceso en MB, o None si no se puede medir."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux da KB y macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except (ImportError, AttributeError):
+        return None
+
+def summarize(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'p50_ms': traductor.percentile(samples_ms, 0.50),
+        'p95_ms': traductor.percentile(samples_ms, 0.95),
+        'p99_ms': traductor.percentile(samples_ms, 0.99),
+        'max_ms': max(samples_ms) if samples_ms else 0.0,
+    }
+
+def parse_roi(text):
+    x1, y1, x2, y2 = (int(value) for value in text.split(","))
+    return (x1, y1, x2, y2)
+
+def run_pipeline_benchmark(args):
+    if not traductor.EASYOCR_ENABLED:
+        traductor.report_missing_easyocr()
+        return None
+    frames = traductor.load_frames_from_directory(args.fixtures)
+    if not frames:
+        print(f"ERROR: No hay imágenes en {args.fixtures}.")
+        return None
+
+    server = StubOllamaServer(args.latencia_primer_token, args.latencia_token,
+                              prompt_token_latency=args.latencia_token_prompt).start()
+    use_stub_ollama(server)
+    traductor.OLLAMA_TUNED_GENERATION = not args.sin_ajustes_ollama
+    source = FixtureCaptureSource()
+    traductor.capture_buffers = source
+
+    print("Cargando y calentando el modelo de OCR...")
+    traductor.warm_up_ocr()
+
+    stages = {'capture': [], 'ocr': [], 'font_size': [], 'translate': [], 'end_to_end': []}
+    previous_boxes = {}
+    start = time.perf_counter()
+    processed_frames = 0
+    translated_lines = 0
+    batch_fallbacks = 0
+    for _ in range(args.repeticiones):
+        for frame in frames:
+            source.frame = frame['image']
+            height, width = frame['image'].shape[:2]
+            rois = args.roi or [(0, 0, width, height)]
+
+            frame_start = time.perf_counter()
+            images = traductor.capture_rois(rois)
+            stages['capture'].append((time.perf_counter() - frame_start) * 1000)
+
+            frame_texts = []
+            for roi_index, image in enumerate(images):
+                stage_start = time.perf_counter()
+                text, boxes = traductor.perform_ocr_with_preset(image, args.preprocesado, previous_boxes.get(roi_index),
+                                                                engine_mode=args.motor_ocr)
+                stages['ocr'].append((time.perf_counter() - stage_start) * 1000)
+                if boxes:
+                    previous_boxes[roi_index] = traductor.next_reference_boxes(args.preprocesado,
+                                                                               previous_boxes.get(roi_index), boxes)
+
+                stage_start = time.perf_counter()
+                traductor.calculate_font_size_from_bbox(boxes)
+                stages['font_size'].append((time.perf_counter() - stage_start) * 1000)
+
+                if text and args.agrupar:
+                    frame_texts.append(text)
+                elif text:
+                    stage_start = time.perf_counter()
+                    traductor.translate_with_ollama(text, on_partial=(lambda partial: None) if args.streaming else None)
+                    stages['translate'].append((time.perf_counter() - stage_start) * 1000)
+                    translated_lines += 1
+
+            if frame_texts:
+                # Todas las ROI del fotograma en una petición, como el modo agrupado de la partida
+                stage_start = time.perf_counter()
+                if traductor.translate_batch_with_ollama(frame_texts) is None:
+                    batch_fallbacks += 1
+                    for text in frame_texts:
+                        traductor.translate_with_ollama(text)
+                stages['translate'].append((time.perf_counter() - stage_start) * 1000)
+                translated_lines += len(frame_texts)
+            # Soltar las vistas para que el búfer de captura se reutilice en el siguiente fotograma
+            images = image = None
+
+            stages['end_to_end'].append((time.perf_counter() - frame_start) * 1000)
+            processed_frames += 1
+
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'config': {
+            'fixtures': os.path.abspath(args.fixtures),
+            'frames': len(frames),
+            'repetitions': args.repeticiones,
+            'rois': args.roi,
+            'preset': args.preprocesado,
+            'ocr_engine_mode': args.motor_ocr,
+            'streaming': args.streaming,
+            'batch': args.agrupar,
+            'first_token_latency_s': args.latencia_primer_token,
+            'token_latency_s': args.latencia_token,
+            'prompt_token_latency_s': args.latencia_token_prompt,
+            'tuned_ollama_generation': traductor.OLLAMA_TUNED_GENERATION,
+        },
+        'stages': {name: summarize(samples) for name, samples in stages.items()},
+        'frames_per_second': processed_frames / elapsed if elapsed > 0 else 0.0,
+        'peak_rss_mb': peak_rss_mb(),
+        'stub_requests': server.requests_served,
+        'batch_fallbacks': batch_fallbacks,
+        'stub_tokens': {
+            'generated': server.tokens_generated,
+            'prompt_evaluated': server.prompt_tokens_evaluated,
+            'generated_per_line': server.tokens_generated / translated_lines if translated_lines else 0.0,
+            'prompt_evaluated_per_line': server.prompt_tokens_evaluated / translated_lines if translated_lines else 0.0,
+        },
+    }
+
+def print_results(results):
+    print(f"{'Etapa':<12}{'n':>6}{'p50 (ms)':>11}{'p95 (ms)':>11}{'p99 (ms)':>11}")
+    for name, stats in results['stages'].items():
+        print(f"{name:<12}{stats['count']:>6}{stats['p50_ms']:>11.1f}{stats['p95_ms']:>11.1f}{stats['p99_ms']:>11.1f}")
+    print(f"Fotogramas por segundo: {results['frames_per_second']:.2f}")
+    if results['peak_rss_mb'] is not None:
+        print(f"Memoria máxima (RSS): {results['peak_rss_mb']:.1f} MB")
+    tokens = results.get('stub_tokens')
+    if tokens:
+        print(f"Tokens por línea: {tokens['generated_per_line']:.1f} generados, "
+              f"{tokens['prompt_evaluated_per_line']:.1f} de prompt evaluados")
+    if results['config'].get('batch'):
+        print(f"Peticiones agrupadas que no se pudieron repartir: {results['batch_fallbacks']}")
+
+# --- Rendimiento de la captura de pantalla ---
+XVFB_SCREEN_SIZE = (1920, 1080)
+XVFB_START_TIMEOUT_S = 5
+DEFAULT_CAPTURE_ROIS = [(160, 820, 1760, 1040), (160, 760, 560, 810)] # Cuadro de diálogo y nombre del personaje
+
+def start_xvfb(size=XVFB_SCREEN_SIZE):
+    """Arranca Xvfb en la primera pantalla libre y apunta DISPLAY a ella. Devuelve el proceso o None."""
+    if shutil.which("Xvfb") is None:
+        print("ERROR: Xvfb no está instalado.")
+        return None
+    for display_number in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{display_number}"):
+            continue
+        process = subprocess.Popen(["Xvfb", f":{display_number}", "-screen", "0", f"{size[0]}x{size[1]}x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + XVFB_START_TIMEOUT_S
+        while time.monotonic() < deadline and process.poll() is None:
+            if os.path.exists(f"/tmp/.X11-unix/X{display_number}"):
+                os.environ["DISPLAY"] = f":{display_number}"
+                return process
+            time.sleep(0.05)
+        process.kill()
+    print("ERROR: No se pudo arrancar Xvfb.")
+    return None
+
+def run_capture_benchmark(args):
+    """
+    Captura las ROI repetidamente con cada motor de captura usando capture_rois,
+    como en la partida. Además de la latencia, cuenta cuántos búferes distintos
+    ha devuelto cada motor: con búferes reutilizables deben ser muy pocos.
+    """
+    xvfb_process = None
+    if args.xvfb:
+        xvfb_process = start_xvfb()
+        if xvfb_process is None:
+            return None
+    try:
+        backends = args.motor or [name for name in traductor.CAPTURE_BACKEND_ORDER if traductor.CAPTURE_BACKENDS[name]['available']]
+        rois = args.roi or DEFAULT_CAPTURE_ROIS
+        results = {
+            'platform': platform.platform(),
+            'display': os.environ.get("DISPLAY"),
+            'rois': rois,
+            'backends': {},
+        }
+        for name in backends:
+            if not traductor.CAPTURE_BACKENDS.get(name, {}).get('available'):
+                print(f"ADVERTENCIA: El motor de captura {name} no está disponible.")
+                continue
+            backend = traductor.capture_buffers = traductor.create_capture_backend(name)
+            samples = []
+            addresses = set()
+            failures = 0
+            start = time.perf_counter()
+            for _ in range(args.repeticiones):
+                capture_start = time.perf_counter()
+                images = traductor.capture_rois(rois)
+                samples.append((time.perf_counter() - capture_start) * 1000)
+                for image in images:
+                    if image is None:
+                        failures += 1
+                        continue
+                    base = image.base if image.base is not None else image
+                    addresses.add(base.__array_interface__['data'][0])
+                # Se sueltan las vistas para que el motor pueda reutilizar sus búferes
+                images = image = base = None
+            elapsed = time.perf_counter() - start
+            fell_back = traductor.capture_buffers is not backend
+            results['backends'][name] = {
+                'capture': summarize(samples),
+                'per_roi_p50_ms': traductor.percentile(samples, 0.50) / len(rois),
+                'captures_per_second': args.repeticiones / elapsed if elapsed > 0 else 0.0,
+                'distinct_buffers': len(addresses),
+                'failures': failures,
+                'fell_back_to': traductor.capture_buffers.name if fell_back else None,
+            }
+        return results
+    finally:
+        if xvfb_process is not None:
+            xvfb_process.terminate()
+            xvfb_process.wait()
+
+def print_capture_results(results):
+    print(f"Pantalla: {results['display']}   ROI: {len(results['rois'])}")
+    print(f"{'Motor':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'ms/ROI':>9}{'Capturas/s':>12}{'Búferes':>9}{'Fallos':>8}")
+    for name, stats in results['backends'].items():
+        print(f"{name:<12}{stats['capture']['p50_ms']:>10.2f}{stats['capture']['p95_ms']:>10.2f}{stats['per_roi_p50_ms']:>9.2f}"
+              f"{stats['captures_per_second']:>12.1f}{stats['distinct_buffers']:>9}{stats['failures']:>8}")
+        if stats['fell_back_to']:
+            print(f"  {name} falló y se pasó a {stats['fell_back_to']}: sus tiempos no son representativos.")
+
+def find_regressions(results, previous, tolerance):
+    """Etapas cuyo p95 ha empeorado más de la tolerancia (fracción) respecto a una ejecución anterior."""
+    regressions = []
+    for name, stats in results['stages'].items():
+        previous_stats = previous.get('stages', {}).get(name)
+        if not previous_stats or previous_stats['p95_ms'] <= 0:
+            continue
+        change = stats['p95_ms'] / previous_stats['p95_ms'] - 1
+        if change > tolerance:
+            regressions.append((name, previous_stats['p95_ms'], stats['p95_ms'], change))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Banco de pruebas del traductor sin interfaz gráfica.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    pipeline = subparsers.add_parser("pipeline", help="Mide captura, OCR, tamaño de fuente y traducción sobre capturas grabadas.")
+    pipeline.add_argument("fixtures", help="Carpeta con las capturas (PNG/JPG).")
+    pipeline.add_argument("--roi", type=parse_roi, action="append",
+                          help="ROI x1,y1,x2,y2 dentro de cada captura (se puede repetir). Por defecto, la imagen completa.")
+    pipeline.add_argument("--repeticiones", type=int, default=3, help="Veces que se recorre la carpeta.")
+    pipeline.add_argument("--preprocesado", default=traductor.DEFAULT_OCR_PREPROCESS_PRESET,
+                          choices=list(traductor.OCR_PREPROCESS_PRESETS), help="Preajuste de preprocesado del OCR.")
+    pipeline.add_argument("--motor-ocr", default=traductor.DEFAULT_OCR_ENGINE_MODE,
+                          choices=list(traductor.OCR_ENGINE_MODES), help="Motores de OCR que se prueban por orden.")
+    pipeline.add_argument("--streaming", action="store_true", help="Pedir la traducción en streaming.")
+    pipeline.add_argument("--agrupar", action="store_true",
+                          help="Traducir los textos de todas las ROI de cada fotograma en una sola petición agrupada.")
+    pipeline.add_argument("--latencia-primer-token", type=float, default=0.2, help="Latencia (s) del servidor simulado hasta el primer token.")
+    pipeline.add_argument("--latencia-token", type=float, default=0.02, help="Latencia (s) del servidor simulado por token.")
+    pipeline.add_argument("--latencia-token-prompt", type=float, default=0.002,
+                          help="Latencia (s) del servidor simulado por token de prompt evaluado.")
+    pipeline.add_argument("--sin-ajustes-ollama", action="store_true",
+                          help="Pedir a Ollama sin prompt de sistema, límite de tokens ni secuencias de parada, para comparar.")
+    pipeline.add_argument("--salida", help="Fichero JSON donde guardar los resultados.")
+    pipeline.add_argument("--comparar-con", help="Resultados JSON anteriores con los que comparar el p95 de cada etapa.")
+    pipeline.add_argument("--tolerancia", type=float, default=0.2, help="Empeoramiento máximo del p95 (fracción) antes de avisar.")
+
+    capture = subparsers.add_parser("captura", help="Mide la latencia de cada motor de captura de pantalla.")
+    capture.add_argument("--motor", action="append", choices=list(traductor.CAPTURE_BACKENDS),
+                         help="Motor de captura a medir (se puede repetir). Por defecto, todos los disponibles.")
+    capture.add_argument("--roi", type=parse_roi, action="append",
+                         help="ROI x1,y1,x2,y2 de la pantalla (se puede repetir). Por defecto, un cuadro de diálogo y un nombre.")
+    capture.add_argument("--repeticiones", type=int, default=200, help="Capturas de todas las ROI por motor.")
+    capture.add_argument("--xvfb", action="store_true", help="Arrancar un Xvfb propio y capturar de él (Linux).")
+    capture.add_argument("--salida", help="Fichero JSON donde guardar los resultados.")
+
+    args = parser.parse_args()
+
+    if args.command == "captura":
+        results = run_capture_benchmark(args)
+        if results is None:
+            return 1
+        print_capture_results(results)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as output_file:
+                json.dump(results, output_file, indent=2, ensure_ascii=False)
+            print(f"Resultados guardados en {args.salida}")
+        return 0
+
+    # Caché en memoria: el banco de pruebas no debe llenar la caché persistente del usuario
+    traductor.translation_cache = traductor.TranslationCache(":memory:", traductor.TRANSLATION_CACHE_MEMORY_ENTRIES,
+                                                       traductor.TRANSLATION_CACHE_DISK_MAX_ENTRIES)
+
+    results = run_pipeline_benchmark(args)
+    if results is None:
+        return 1
+    print_results(results)
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2, ensure_ascii=False)
+        print(f"Resultados guardados en {args.salida}")
+
+    if args.comparar_con:
+        with open(args.comparar_con, encoding="utf-8") as previous_file:
+            regressions = find_regressions(results, json.load(previous_file), args.tolerancia)
+        for name, before, after, change in regressions:
+            print(f"REGRESIÓN en {name}: p95 {before:.1f} ms -> {after:.1f} ms (+{change:.0%})")
+        if regressions:
+            return 1
+        print("Sin regresiones respecto a la ejecución anterior.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
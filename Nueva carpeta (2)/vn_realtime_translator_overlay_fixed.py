@@ -16,84 +16,345 @@
 #   pip install requests
 #   (y el servidor de Ollama debe estar en ejecución: ollama run mistral)
 
-import cv2
-import numpy as np
 import time
-from PIL import ImageGrab, Image
+import abc
+import argparse
+import difflib
+
+# Momento de arranque del programa, para medir el tiempo hasta la ventana y hasta el OCR listo
+PROGRAM_START = time.perf_counter()
+
+import importlib.util
+import numpy as np
 import tkinter as tk
 from tkinter import font, messagebox
 import customtkinter as ctk
-import pygetwindow as gw
 import sys
 import threading
 import queue
-import keyboard
+import multiprocessing
+from multiprocessing import shared_memory
 import subprocess
 import os
+import json
+import re
+import sqlite3
+import hashlib
+import weakref
+import logging
+import logging.handlers
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED, TimeoutError as FutureTimeoutError
 
 # --- Dependencias del programa ---
-try:
-    import easyocr
-    easyocr_reader = easyocr.Reader(['en', 'es'])
-    print("EasyOCR se ha inicializado correctamente.")
-except ImportError:
+# EasyOCR (y con él torch), OpenCV y Pillow se importan cuando se necesitan por primera
+# vez: así la ventana aparece enseguida y el modelo de OCR se carga en segundo plano.
+# pygetwindow y keyboard solo los usa la interfaz: los procesos de OCR, que vuelven a
+# importar este archivo, y el banco de pruebas no los cargan (ni fallan sin ellos).
+# Sin easyocr el programa no puede arrancar, pero el módulo se puede importar (el banco
+# de pruebas de captura no lo necesita): la comprobación se hace al empezar a usarlo
+EASYOCR_ENABLED = importlib.util.find_spec("easyocr") is not None
+
+def report_missing_easyocr():
     print("ERROR: Asegúrate de tener instalada la biblioteca 'easyocr'.")
     print("Ejecuta: pip install easyocr")
-    sys.exit()
+
+OCR_LANGUAGES = ['en', 'es']
+easyocr_reader = None
+easyocr_reader_lock = threading.Lock()
+
+# Tesseract es opcional: un primer paso de OCR mucho más ligero que EasyOCR
+if importlib.util.find_spec("pytesseract") is not None:
+    TESSERACT_ENABLED = True
+else:
+    print("ADVERTENCIA: La biblioteca 'pytesseract' no está instalada. Todo el OCR se hará con EasyOCR.")
+    print("Para usar Tesseract como primer paso, instala Tesseract y ejecuta: pip install pytesseract")
+    TESSERACT_ENABLED = False
 
 # Intentar importar las dependencias de los traductores, de forma opcional
-try:
-    from googletrans import Translator
-    google_translator = Translator()
+if importlib.util.find_spec("googletrans") is not None:
     GOOGLE_TRANSLATE_ENABLED = True
-except ImportError:
+else:
     print("ADVERTENCIA: La biblioteca 'googletrans' no está instalada. No podrás usar el traductor de Google.")
     print("Para instalarla, ejecuta: pip install googletrans")
     GOOGLE_TRANSLATE_ENABLED = False
+google_translator = None
+google_translator_lock = threading.Lock()
 
 try:
     import requests
-    OLLAMA_API_URL = "http://localhost:11434/api/generate"
+    OLLAMA_BASE_URL = "http://localhost:11434"
+    OLLAMA_API_URL = f"{OLLAMA_BASE_URL}/api/generate"
     OLLAMA_MODEL = "mistral"
+    OLLAMA_KEEP_ALIVE = "30m"       # Tiempo que Ollama mantiene el modelo cargado tras cada uso (-1 = siempre)
+    OLLAMA_READY_TIMEOUT_S = 30     # Tiempo máximo de espera a que el servidor responda tras iniciarlo
+    OLLAMA_STREAM_UPDATE_INTERVAL_S = 0.05  # Intervalo mínimo entre actualizaciones parciales del recuadro
+    OLLAMA_REQUEST_TIMEOUT_S = 60   # Tiempo máximo de una petición de traducción
+    # Generación ajustada: prompt de sistema fijo (Ollama reutiliza el prefijo ya evaluado
+    # entre peticiones), límite de tokens según la longitud del texto y secuencias de parada
+    OLLAMA_TUNED_GENERATION = True
+    OLLAMA_SYSTEM_PROMPT = ("Eres un traductor de videojuegos. Traduce al español el texto que envíe el usuario. "
+                            "Responde únicamente con la traducción, sin comillas, notas ni explicaciones.")
+    OLLAMA_STOP_SEQUENCES = ["\n\n", "\nNota", "\nNote", "\n("]
+    OLLAMA_NUM_PREDICT_PER_CHAR = 0.6 # Tokens de salida permitidos por carácter del texto original
+    OLLAMA_NUM_PREDICT_MIN = 16
+    OLLAMA_NUM_PREDICT_MAX = 400
     OLLAMA_ENABLED = True
 except ImportError:
     print("ADVERTENCIA: La biblioteca 'requests' no está instalada. No podrás usar el traductor de Ollama.")
     print("Para instalarla, ejecuta: pip install requests")
     OLLAMA_ENABLED = False
 
+# --- Configuración del modo continuo ---
+CONTINUOUS_INTERVAL_S = 0.5   # Intervalo por defecto entre capturas de cada ROI
+FRAME_DIFF_CELL_PX = 8            # Lado (px) de cada celda de la miniatura usada para comparar fotogramas
+FRAME_DIFF_CELL_THRESHOLD = 24    # Diferencia (0-255) a partir de la cual una celda ha cambiado
+FRAME_DIFF_MIN_CHANGED_CELLS = 2  # Celdas cambiadas a partir de las cuales se lanza el OCR (unas pocas letras bastan)
+
+# --- Configuración de la caché de traducciones ---
+TRANSLATION_TARGET_LANGUAGE = "es"
+TRANSLATION_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "translation_cache.sqlite3")
+TRANSLATION_CACHE_MEMORY_ENTRIES = 2000     # Entradas en la caché LRU en memoria
+TRANSLATION_CACHE_DISK_MAX_ENTRIES = 100000 # Entradas máximas en la caché SQLite antes de desalojar
+TRANSLATION_FALLBACK_ALIAS_TTL_S = 300      # Vida (solo en esta sesión) de la traducción del respaldo bajo el motor pedido
+
+# --- Configuración del motor de traducción ---
+TRANSLATION_ENGINE_THREADS = 8                                        # Peticiones en curso como máximo entre todos los motores
+TRANSLATION_BACKEND_LIMITS = {"Google Translate": 4, "Ollama": 2}     # Peticiones simultáneas por motor
+TRANSLATION_BACKEND_TIMEOUTS_S = {"Google Translate": 10, "Ollama": 60}
+TRANSLATION_HEDGE_FALLBACKS = {"Ollama": "Google Translate"}          # Motor de respaldo para las peticiones lentas
+TRANSLATION_HEDGE_PERCENTILE = 0.95   # Si el motor tarda más que este percentil de sus tiempos, se pide también al respaldo
+TRANSLATION_HEDGE_DEFAULT_DELAY_S = 3.0  # Espera antes de pedir al respaldo mientras no hay tiempos medidos
+TRANSLATION_HEDGE_MIN_DELAY_S = 0.3
+
+# --- Configuración del texto que aparece letra a letra (efecto máquina de escribir) ---
+TYPEWRITER_SAMPLE_INTERVAL_S = 0.15  # Intervalo entre capturas mientras el texto sigue apareciendo
+TYPEWRITER_MAX_WAIT_S = 3.0          # Espera máxima a que el texto termine de aparecer
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?…])\s+|(?<=[。！？])\s*")  # El japonés no separa las frases con espacios
+# Tras estas abreviaturas (y tras una inicial, "J. Smith") un punto no termina la frase
+SENTENCE_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "sr", "sra", "srta", "jr", "vs", "etc", "prof"}
+
+# --- Configuración de la interfaz ---
+# La interfaz vacía la cola de mensajes desde su propio bucle: a menudo mientras llegan
+# mensajes y cada vez menos cuando no hay actividad (Tk no admite llamadas desde otros hilos)
+UI_POLL_BUSY_MS = 10
+UI_POLL_IDLE_MS = 100
+UI_CALL_TIMEOUT_S = 2.0              # Espera máxima de un hilo de trabajo por una operación en la interfaz
+
+# --- Configuración del registro de la sesión ---
+LOG_MAX_LINES = 500      # Líneas que conserva el recuadro de seguimiento; las antiguas se descartan
+LOG_FLUSH_MS = 100       # Los mensajes de una ráfaga se insertan juntos en el recuadro
+LOG_FILE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "traductor.log") # Historial completo
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+# --- Configuración de la comparación aproximada de textos ---
+# Solo se tolera el ruido del OCR, nunca un cambio real: dos lecturas son la misma
+# línea si tienen las mismas palabras y cifras y solo difieren en mayúsculas,
+# puntuación o en los caracteres que el OCR confunde entre sí
+OCR_CONFUSABLE_SEQUENCES = (("rn", "m"),)    # Secuencias que el OCR lee como otra letra
+OCR_CONFUSABLE_CHARACTERS = str.maketrans({  # Caracteres que el OCR intercambia (l/I/1, O/0)
+    "i": "l", "1": "l", "|": "l", "0": "o",
+})
+FUZZY_MEMORY_MAX_ENTRIES = 20000        # Líneas guardadas en la memoria de traducción aproximada
+
+# --- Configuración del pipeline de captura, OCR y traducción ---
+PIPELINE_QUEUE_SIZE = 8   # Tamaño máximo de cada cola entre etapas
+TRANSLATION_WORKERS = 3   # Hilos de traducción concurrentes
+
+# --- Configuración de la captura ---
+UNION_CAPTURE_MAX_OVERHEAD = 4.0  # Si la unión de las ROI es N veces mayor que su suma, se capturan por separado
+CAPTURE_BUFFER_POOL_SIZE = 2      # Búferes de captura reutilizables que se conservan
+# Motores de captura por orden de preferencia. mss (10.2 o posterior) usa XShmGetImage
+# en X11 y BitBlt en Windows; ImageGrab queda como respaldo (en X11 captura la pantalla entera)
+CAPTURE_BACKEND_ORDER = ["mss", "ImageGrab"]
+CAPTURE_STRATEGY_OVERLAPPING = "Ocultar solo los recuadros solapados"
+CAPTURE_STRATEGY_WINDOW = "Contenido de la ventana del juego (Windows)"
+CAPTURE_STRATEGY_HIDE_ALL = "Ocultar todos los recuadros"
+CAPTURE_STRATEGIES = [CAPTURE_STRATEGY_OVERLAPPING, CAPTURE_STRATEGY_WINDOW, CAPTURE_STRATEGY_HIDE_ALL]
+DEFAULT_CAPTURE_STRATEGY = CAPTURE_STRATEGY_WINDOW if sys.platform == "win32" else CAPTURE_STRATEGY_OVERLAPPING
+OVERLAY_UNMAP_TIMEOUT_S = 0.1     # Espera máxima del evento <Unmap> de los recuadros ocultados
+OVERLAY_UNMAP_SETTLE_S = 0.02     # Margen tras el <Unmap> para que el compositor redibuje la pantalla
+
+# --- Configuración del preprocesado para el OCR ---
+# Cada preajuste reduce el trabajo de EasyOCR: escala de grises, binarización adaptativa,
+# reescalado a una altura de texto objetivo y recorte a las regiones de texto conocidas.
+OCR_PREPROCESS_PRESETS = {
+    "Original": {},
+    "Gris": {"grayscale": True},
+    "Binarizado": {"grayscale": True, "binarize": True},
+    "Gris reescalado": {"grayscale": True, "resize": True},
+    "Rápido": {"grayscale": True, "resize": True, "crop": True},
+}
+DEFAULT_OCR_PREPROCESS_PRESET = "Original"
+OCR_TARGET_TEXT_HEIGHT = 32   # Altura de texto (px) a la que se reduce la imagen antes del OCR
+OCR_MIN_SCALE = 0.25          # Reducción máxima permitida al reescalar
+OCR_CROP_MARGIN = 12          # Margen vertical mínimo (px) alrededor del texto al recortar
+OCR_CROP_EDGE_TOLERANCE = 4   # Una caja a menos de estos px del borde del recorte indica texto cortado
+# --- Motores de OCR ---
+# Cada modo es una lista de motores por orden: si la confianza media del primero
+# queda por debajo del umbral, se repite el OCR con el siguiente
+OCR_ENGINE_MODE_EASYOCR = "Solo EasyOCR"
+OCR_ENGINE_MODE_TIERED = "Tesseract (EasyOCR si duda)"
+OCR_ENGINE_MODES = {
+    OCR_ENGINE_MODE_EASYOCR: ["EasyOCR"],
+    OCR_ENGINE_MODE_TIERED: ["Tesseract", "EasyOCR"],
+}
+DEFAULT_OCR_ENGINE_MODE = OCR_ENGINE_MODE_TIERED if TESSERACT_ENABLED else OCR_ENGINE_MODE_EASYOCR
+OCR_TIER_MIN_CONFIDENCE = 0.75     # Confianza media (0-1) por debajo de la cual se pasa al motor siguiente
+OCR_MIN_FRAGMENT_CONFIDENCE = 0.3  # Los fragmentos con menos confianza se descartan antes de traducir
+TESSERACT_CONFIG = "--psm 6"       # Un único bloque de texto, como un cuadro de diálogo
+TESSERACT_LANGUAGE_CODES = {'en': 'eng', 'es': 'spa', 'ja': 'jpn', 'fr': 'fra', 'de': 'deu', 'it': 'ita', 'pt': 'por'}
+CAPTURED_FRAMES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "capturas")
+
+# --- Configuración del OCR en procesos separados ---
+# Cada proceso carga su propio modelo de EasyOCR (varios cientos de MB de memoria)
+OCR_PROCESS_COUNT = max(1, min(4, (os.cpu_count() or 1) // 4))
+OCR_PROCESS_TORCH_THREADS = max(1, (os.cpu_count() or 1) // OCR_PROCESS_COUNT)
+OCR_PROCESS_PIN_CPUS = True              # Fijar cada proceso a su propio grupo de núcleos
+OCR_PROCESS_START_TIMEOUT_S = 180        # Cargar el modelo en un proceso nuevo puede tardar bastante
+OCR_PROCESS_IDLE_POLL_S = 0.5            # Cada cuánto se comprueba, al esperar un proceso libre, si queda alguno
+OCR_SHARED_FRAME_BYTES = 1920 * 1080 * 3 # Tamaño inicial del búfer compartido de cada proceso
+
+# --- Configuración del OCR incremental ---
+INCREMENTAL_OCR_PIXEL_THRESHOLD = 24          # Diferencia de gris (0-255) para considerar que un píxel ha cambiado
+INCREMENTAL_OCR_BOX_MARGIN = 4                # Margen alrededor de cada caja detectada
+# Una mancha de píxeles cambiados fuera de las cajas obliga a detectar de nuevo si su área llega a
+# la de un carácter: (altura del texto * INCREMENTAL_OCR_MIN_GLYPH_FRACTION) ** 2
+INCREMENTAL_OCR_MIN_GLYPH_FRACTION = 0.25
+INCREMENTAL_OCR_DEFAULT_TEXT_HEIGHT = 16       # Altura (px) supuesta del texto mientras no hay cajas detectadas
+
+# --- Configuración de la caché de resultados del OCR ---
+OCR_CACHE_MAX_BYTES = 8 * 1024 * 1024 # Memoria aproximada máxima de la caché de resultados del OCR
+OCR_CACHE_PERCEPTUAL = False          # True: hash perceptual (tolera ruido de compresión, pero dos textos parecidos pueden chocar)
+OCR_CACHE_HASH_SIZE = (33, 32)        # Rejilla del hash perceptual (ancho + 1, alto)
+OCR_CACHE_PERSIST = False             # Guardar también los resultados en disco entre sesiones
+OCR_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ocr_cache.sqlite3")
+OCR_CACHE_DISK_MAX_ENTRIES = 50000    # Entradas máximas en la tabla SQLite antes de desalojar
+
+# --- Configuración del modo por lotes (sin interfaz) ---
+CAPTURED_FRAME_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+BATCH_TRANSLATION_CHUNK = 20  # Líneas por petición agrupada al traducir un lote
+BATCH_OUTPUT_PATH = "traducciones_lote.json"
+
+# --- Configuración de las métricas de rendimiento ---
+METRICS_WINDOW = 200             # Muestras por etapa que se conservan (ventana móvil)
+METRICS_REFRESH_MS = 1000        # Intervalo de refresco del panel de rendimiento
+METRICS_EXPORT_INTERVAL_S = 10   # Intervalo de exportación de las métricas a disco (0 = no exportar)
+# Con extensión .json se exporta en JSON; con cualquier otra, en formato de texto de Prometheus
+METRICS_EXPORT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metricas_traductor.prom")
+
 # --- Variables globales y de estado del programa ---
 selected_window = None
 roi_coords = None
-translation_running = False
-translation_queue = queue.Queue()
+continuous_mode_running = False
+translation_queue = queue.Queue() # Mensajes de los hilos de trabajo para el hilo de la interfaz
 after_id = None
 translation_windows = []
+translation_windows_by_id = {}
+overlay_fonts = {}
 last_extracted_text_per_roi = {}
+last_frame_signature_per_roi = {}
+last_bounding_boxes_per_roi = {}
 ollama_process = None
+ollama_session = None
+ollama_session_lock = threading.Lock()
+ollama_start_lock = threading.Lock()
 
 
-def start_ollama_server():
+def get_ollama_session():
     """
-    Inicia el servidor de Ollama si no está en ejecución.
-    Espera unos segundos para que se inicialice.
+    Devuelve la sesión HTTP compartida con Ollama. Mantiene las conexiones abiertas
+    (keep-alive) para que cada traducción no tenga que abrir una nueva.
     """
-    global ollama_process
-    print("Intentando iniciar el servidor de Ollama...")
+    global ollama_session
+    with ollama_session_lock:
+        if ollama_session is None:
+            ollama_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=TRANSLATION_WORKERS + 2)
+            ollama_session.mount("http://", adapter)
+            ollama_session.mount("https://", adapter)
+        return ollama_session
+
+def is_ollama_ready():
+    """Comprueba con una petición barata si el servidor de Ollama responde."""
     try:
-        # El comando 'ollama serve'
-        command = ["ollama", "serve"]
-        
-        # Iniciar el proceso de forma asíncrona
-        ollama_process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-        time.sleep(5) # Esperar a que el servidor se inicialice
-        return True
-    except FileNotFoundError:
-        print("ERROR: El comando 'ollama' no se encontró. Asegúrate de que Ollama está instalado y en el PATH.")
+        response = get_ollama_session().get(f"{OLLAMA_BASE_URL}/api/version", timeout=1)
+        return response.ok
+    except requests.exceptions.RequestException:
         return False
-    except Exception as e:
-        print(f"ERROR al iniciar el servidor de Ollama: {e}")
+
+def wait_for_ollama_ready(timeout=OLLAMA_READY_TIMEOUT_S):
+    """
+    Sondea el servidor de Ollama con espera exponencial hasta que responda, en
+    lugar de dormir un tiempo fijo. Devuelve False si no responde a tiempo o si
+    el proceso que lanzamos ha terminado.
+    """
+    deadline = time.monotonic() + timeout
+    delay = 0.05
+    while True:
+        if is_ollama_ready():
+            return True
+        if ollama_process is not None and ollama_process.poll() is not None:
+            print("ERROR: El proceso del servidor de Ollama ha terminado inesperadamente.")
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 1.0)
+
+def preload_ollama_model():
+    """
+    Carga el modelo en memoria y lo fija durante OLLAMA_KEEP_ALIVE, para que la
+    primera traducción no pague el tiempo de carga del modelo.
+    """
+    payload = {"model": OLLAMA_MODEL, "keep_alive": OLLAMA_KEEP_ALIVE}
+    if OLLAMA_TUNED_GENERATION:
+        # Una generación de un token deja evaluado el prompt de sistema para la primera traducción
+        payload.update(system=OLLAMA_SYSTEM_PROMPT, prompt="Hola", options={"num_predict": 1})
+    try:
+        response = get_ollama_session().post(OLLAMA_API_URL, json=payload, timeout=120)
+        response.raise_for_status()
+        return True
+    except requests.exceptions.RequestException as e:
+        print(f"ERROR al precargar el modelo de Ollama: {e}")
         return False
 
+def start_ollama_server():
+    """
+    Inicia el servidor de Ollama si no está en ejecución y espera a que
+    responda. Devuelve True cuando el servidor está listo.
+    """
+    global ollama_process
+    with ollama_start_lock:
+        # Otro hilo de traducción puede haberlo iniciado mientras esperábamos
+        if is_ollama_ready():
+            return True
+
+        print("Intentando iniciar el servidor de Ollama...")
+        try:
+            # El comando 'ollama serve'
+            command = ["ollama", "serve"]
+
+            # Iniciar el proceso de forma asíncrona. La salida se descarta: si nadie
+            # lee de un PIPE, el servidor se bloquea cuando se llena el búfer
+            ollama_process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except FileNotFoundError:
+            print("ERROR: El comando 'ollama' no se encontró. Asegúrate de que Ollama está instalado y en el PATH.")
+            return False
+        except Exception as e:
+            print(f"ERROR al iniciar el servidor de Ollama: {e}")
+            return False
+
+        start = time.monotonic()
+        if not wait_for_ollama_ready():
+            print(f"ERROR: El servidor de Ollama no respondió en {OLLAMA_READY_TIMEOUT_S} s.")
+            return False
+        print(f"Servidor de Ollama listo en {time.monotonic() - start:.2f} s.")
+        preload_ollama_model()
+        return True
+
 
 def show_warning(title, message):
     """Muestra un cuadro de mensaje de advertencia."""
@@ -101,6 +362,7 @@ def show_warning(title, message):
 
 def get_window_titles():
     """Obtiene los títulos de todas las ventanas visibles."""
+    import pygetwindow as gw
     return [w.title for w in gw.getAllWindows() if w.title]
 
 def select_roi(main_gui):
@@ -166,34 +428,765 @@ def select_roi(main_gui):
 
     selection_window.wait_window()
 
+# --- Registro de la sesión ---
+session_logger = logging.getLogger("traductor")
+session_logger.setLevel(logging.INFO)
+session_logger.propagate = False
+
+def start_session_log(path=LOG_FILE_PATH):
+    """
+    Envía el historial completo de la sesión a un archivo rotativo. Los hilos
+    solo encolan el registro; la escritura en disco la hace el hilo del
+    QueueListener. Devuelve el listener, que hay que parar al salir.
+    """
+    try:
+        file_handler = logging.handlers.RotatingFileHandler(path, maxBytes=LOG_FILE_MAX_BYTES, backupCount=LOG_FILE_BACKUPS,
+                                                            encoding="utf-8", delay=True)
+    except OSError as e:
+        print(f"ADVERTENCIA: No se pudo abrir el archivo de registro ({e}).")
+        return None
+    file_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log_queue = queue.Queue()
+    session_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    return listener
+
+# --- Métricas de rendimiento ---
+STAGE_LABELS = {
+    'hide_overlays': "Ocultar recuadros",
+    'capture': "Captura",
+    'ocr': "OCR",
+    'translate': "Traducción",
+    'backend': "Traductor (sin caché)",
+    'ocr_engine': "Motor de OCR",
+    'queue_wait': "Espera en cola",
+    'render': "Dibujado",
+    'end_to_end': "Total",
+}
+COUNTER_LABELS = {
+    'ocr_calls': "OCR ejecutados",
+    'ocr_skipped': "OCR omitidos",
+    'cache_hits': "Aciertos de caché",
+    'cache_misses': "Fallos de caché",
+    'backend_errors': "Errores del traductor",
+    'ui_merged': "Actualizaciones fusionadas",
+    'hedged_requests': "Peticiones al respaldo",
+    'hedge_wins': "Ganadas por el respaldo",
+    'typewriter_resamples': "Recapturas por texto en curso",
+    'ocr_cache_hits': "Aciertos de la caché del OCR",
+    'ocr_detections': "Detecciones completas",
+    'ocr_boxes_reused': "Cajas reutilizadas",
+    'ocr_tier_fallbacks': "OCR repetidos con el motor siguiente",
+    'ocr_fragments_dropped': "Fragmentos de OCR descartados",
+    'coalesced_requests': "Peticiones sustituidas por otra más reciente",
+    'stale_ocr': "OCR descartados (fotograma superado)",
+    'stale_translations': "Traducciones descartadas (línea superada)",
+}
+
+def percentile(values, fraction):
+    """Percentil (0-1) de una lista de valores, con interpolación lineal."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+class PerformanceMetrics:
+    """
+    Latencias por etapa en ventanas móviles (global, por ROI y por motor) y
+    contadores de eventos. Se muestran en el panel de rendimiento y se exportan
+    periódicamente en JSON o en el formato de texto de Prometheus.
+    """
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self.samples = {}   # (etapa, etiqueta, valor) -> deque de segundos
+        self.totals = {}    # (etapa, etiqueta, valor) -> [número de muestras, suma de segundos]
+        self.counters = {}  # (evento, etiqueta, valor) -> total
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def keys_for(name, roi_id=None, backend=None):
+        keys = [(name, "", "")]
+        if roi_id is not None:
+            keys.append((name, "roi", str(roi_id)))
+        if backend is not None:
+            keys.append((name, "backend", backend))
+        return keys
+
+    def record(self, stage, seconds, roi_id=None, backend=None):
+        with self.lock:
+            for key in self.keys_for(stage, roi_id, backend):
+                self.samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+                totals = self.totals.setdefault(key, [0, 0.0])
+                totals[0] += 1
+                totals[1] += seconds
+
+    def increment(self, counter, amount=1, backend=None):
+        with self.lock:
+            for key in self.keys_for(counter, backend=backend):
+                self.counters[key] = self.counters.get(key, 0) + amount
+
+    def drain(self):
+        """Devuelve y vacía las muestras y los contadores (así los envía un proceso de OCR al principal)."""
+        with self.lock:
+            samples = [(key, list(values)) for key, values in self.samples.items()]
+            counters = dict(self.counters)
+            self.samples.clear()
+            self.totals.clear()
+            self.counters.clear()
+        return samples, counters
+
+    def merge(self, drained):
+        """Suma lo devuelto por drain() en otro proceso."""
+        samples, counters = drained
+        with self.lock:
+            for key, values in samples:
+                self.samples.setdefault(key, deque(maxlen=self.window)).extend(values)
+                totals = self.totals.setdefault(key, [0, 0.0])
+                totals[0] += len(values)
+                totals[1] += sum(values)
+            for key, total in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + total
+
+    def percentile(self, stage, fraction, roi_id=None, backend=None):
+        """Percentil de la ventana móvil de una etapa, o None si aún no hay muestras."""
+        key = self.keys_for(stage, roi_id, backend)[-1]
+        with self.lock:
+            values = list(self.samples.get(key, ()))
+        return percentile(values, fraction) if values else None
+
+    def snapshot(self):
+        with self.lock:
+            stages = []
+            for (stage, label, value), samples in self.samples.items():
+                values = list(samples)
+                count, total = self.totals[(stage, label, value)]
+                stages.append({
+                    'stage': stage, 'label': label, 'value': value,
+                    'window': len(values), 'count': count, 'sum_s': total,
+                    'p50_s': percentile(values, 0.50), 'p95_s': percentile(values, 0.95), 'p99_s': percentile(values, 0.99),
+                })
+            counters = [{'counter': name, 'label': label, 'value': value, 'total': total}
+                        for (name, label, value), total in self.counters.items()]
+        return {'timestamp': time.time(), 'stages': stages, 'counters': counters}
+
+    def summary_text(self):
+        """Resumen para el panel de rendimiento: p50/p95 global de cada etapa y los contadores."""
+        snapshot = self.snapshot()
+        global_stages = {row['stage']: row for row in snapshot['stages'] if not row['label']}
+        lines = []
+        for stage, label in STAGE_LABELS.items():
+            row = global_stages.get(stage)
+            if row:
+                lines.append(f"{label:<22} p50 {row['p50_s'] * 1000:7.1f} ms   p95 {row['p95_s'] * 1000:7.1f} ms   n={row['count']}")
+        counters = {row['counter']: row['total'] for row in snapshot['counters'] if not row['label']}
+        engine_counters = {(row['counter'], row['value']): row['total'] for row in snapshot['counters'] if row['label'] == "backend"}
+        for row in snapshot['stages']:
+            if row['stage'] == 'ocr_engine' and row['label'] == "backend":
+                lines.append(f"  {row['value']:<20} p50 {row['p50_s'] * 1000:7.1f} ms   p95 {row['p95_s'] * 1000:7.1f} ms   n={row['count']}"
+                             f"   aceptados {engine_counters.get(('ocr_tier_accepted', row['value']), 0)}"
+                             f"   al siguiente {engine_counters.get(('ocr_tier_fallbacks', row['value']), 0)}")
+        lines.append("   ".join(f"{label}: {counters.get(name, 0)}" for name, label in COUNTER_LABELS.items()))
+        return "\n".join(lines)
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ["# HELP traductor_stage_latency_seconds Latencia de cada etapa (ventana móvil).",
+                 "# TYPE traductor_stage_latency_seconds summary"]
+        for row in snapshot['stages']:
+            labels = f'stage="{row["stage"]}"' + (f',{row["label"]}="{row["value"]}"' if row['label'] else "")
+            for quantile in ("0.5", "0.95", "0.99"):
+                value = row[{'0.5': 'p50_s', '0.95': 'p95_s', '0.99': 'p99_s'}[quantile]]
+                lines.append(f'traductor_stage_latency_seconds{{{labels},quantile="{quantile}"}} {value:.6f}')
+            lines.append(f"traductor_stage_latency_seconds_count{{{labels}}} {row['count']}")
+            lines.append(f"traductor_stage_latency_seconds_sum{{{labels}}} {row['sum_s']:.6f}")
+        lines += ["# HELP traductor_events_total Eventos contados desde el arranque.",
+                  "# TYPE traductor_events_total counter"]
+        for row in snapshot['counters']:
+            labels = f'event="{row["counter"]}"' + (f',{row["label"]}="{row["value"]}"' if row['label'] else "")
+            lines.append(f"traductor_events_total{{{labels}}} {row['total']}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Escribe las métricas en path de forma atómica (JSON si la extensión es .json)."""
+        if path.lower().endswith(".json"):
+            content = json.dumps(self.snapshot(), indent=2, ensure_ascii=False)
+        else:
+            content = self.to_prometheus()
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(content)
+        os.replace(temporary_path, path)
+
+performance_metrics = PerformanceMetrics()
+
 # --- Funciones de procesamiento ---
+def get_easyocr_reader():
+    """
+    Devuelve el lector de EasyOCR, creándolo la primera vez. Importar easyocr
+    arrastra torch y cargar el modelo tarda varios segundos.
+    """
+    global easyocr_reader
+    with easyocr_reader_lock:
+        if easyocr_reader is None:
+            import easyocr
+            easyocr_reader = easyocr.Reader(OCR_LANGUAGES)
+            print("EasyOCR se ha inicializado correctamente.")
+        return easyocr_reader
+
+def warm_up_ocr():
+    """
+    Carga el lector de EasyOCR y ejecuta una inferencia sobre una imagen sintética
+    para que la primera captura real no pague el coste del arranque en frío.
+    """
+    import cv2
+
+    reader = get_easyocr_reader()
+    image = np.full((64, 320, 3), 255, dtype=np.uint8)
+    cv2.putText(image, "Warm up 123", (10, 45), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+    reader.readtext(image)
+
+def get_google_translator():
+    """Devuelve el cliente de Google Translate, creándolo la primera vez."""
+    global google_translator
+    with google_translator_lock:
+        if google_translator is None:
+            from googletrans import Translator
+            google_translator = Translator()
+        return google_translator
+
+class CaptureBufferPool(abc.ABC):
+    """
+    Búferes NumPy preasignados donde se copian las capturas de pantalla. Un búfer
+    solo se reutiliza cuando ya no quedan vistas suyas en uso (por ejemplo, una
+    ROI que todavía está en la cola del OCR); si no, se asigna uno nuevo.
+    Cada motor de captura es una subclase que implementa grab.
+    """
+
+    def __init__(self, max_buffers=CAPTURE_BUFFER_POOL_SIZE):
+        self.max_buffers = max_buffers
+        self.buffers = [] # {'shape', 'memory': bytearray, 'owner': weakref del array entregado}
+        self.lock = threading.Lock()
+
+    def acquire(self, shape):
+        """
+        Devuelve un array de la forma pedida sobre un búfer libre. Cada entrega
+        crea un array nuevo sobre la memoria del búfer y el grupo guarda una
+        referencia débil a él: numpy hace que todas las vistas que salgan de
+        ese array (los recortes de capture_rois, por ejemplo) lo tengan como
+        .base, así que el búfer sigue ocupado mientras quede alguna viva.
+        """
+        with self.lock:
+            for entry in self.buffers:
+                if entry['shape'] == shape and entry['owner']() is None:
+                    break
+            else:
+                entry = {'shape': shape, 'memory': bytearray(int(np.prod(shape))), 'owner': lambda: None}
+                self.buffers.append(entry)
+                if len(self.buffers) > self.max_buffers:
+                    self.buffers.pop(0)
+            owner = np.frombuffer(entry['memory'], dtype=np.uint8)
+            entry['owner'] = weakref.ref(owner)
+            return owner.reshape(shape)
+
+    @abc.abstractmethod
+    def grab(self, bbox):
+        """Captura bbox (x1, y1, x2, y2) de la pantalla en un búfer reutilizable (RGB, uint8)."""
+
+class ImageGrabCapture(CaptureBufferPool):
+    """Captura con PIL.ImageGrab. Funciona en todas partes, pero asigna una imagen nueva en cada llamada."""
+
+    name = "ImageGrab"
+
+    def grab(self, bbox):
+        from PIL import ImageGrab
+
+        captured_image = ImageGrab.grab(bbox=bbox)
+        if captured_image.mode != "RGB":
+            captured_image = captured_image.convert("RGB")
+        width, height = captured_image.size
+        buffer = self.acquire((height, width, 3))
+        np.copyto(buffer, np.asarray(captured_image))
+        return buffer
+
+class MssCapture(CaptureBufferPool):
+    """
+    Captura con mss: pide al servidor gráfico solo la región de la ROI (por
+    memoria compartida en X11) y convierte los píxeles BGRA directamente al
+    búfer reutilizable, sin pasar por una imagen de PIL. Cada hilo usa su
+    propia conexión, porque las de mss no se pueden compartir entre hilos.
+    """
+
+    name = "mss"
+
+    def __init__(self, max_buffers=CAPTURE_BUFFER_POOL_SIZE):
+        super().__init__(max_buffers)
+        self.local = threading.local()
+
+    def grab(self, bbox):
+        import cv2
+        import mss
+
+        screen = getattr(self.local, "screen", None)
+        if screen is None:
+            screen = self.local.screen = mss.mss()
+        x1, y1, x2, y2 = bbox
+        screenshot = screen.grab({"left": x1, "top": y1, "width": x2 - x1, "height": y2 - y1})
+        width, height = screenshot.size
+        bgra = np.frombuffer(screenshot.raw, dtype=np.uint8).reshape(height, width, 4)
+        buffer = self.acquire((height, width, 3))
+        cv2.cvtColor(bgra, cv2.COLOR_BGRA2RGB, dst=buffer)
+        return buffer
+
+CAPTURE_BACKENDS = {
+    "mss": {'available': importlib.util.find_spec("mss") is not None, 'class': MssCapture},
+    "ImageGrab": {'available': True, 'class': ImageGrabCapture},
+}
+
+def create_capture_backend(name=None):
+    """Crea el motor de captura indicado o, si no se indica, el primero disponible de CAPTURE_BACKEND_ORDER."""
+    for backend in ([name] if name else CAPTURE_BACKEND_ORDER):
+        if CAPTURE_BACKENDS.get(backend, {}).get('available'):
+            return CAPTURE_BACKENDS[backend]['class']()
+    return ImageGrabCapture()
+
+capture_buffers = create_capture_backend()
+
 def capture_and_preprocess(roi_coords):
-    """Captura una región de la pantalla y la preprocesa para OCR."""
+    """
+    Captura una región de la pantalla para el OCR. La imagen se devuelve en RGB:
+    EasyOCR acepta el array tal cual, así que no hace falta convertirla a BGR.
+    Si mss falla (por ejemplo, sin acceso al servidor X), se pasa a ImageGrab.
+    """
+    global capture_buffers
+
     try:
-        captured_image = ImageGrab.grab(bbox=roi_coords)
-        img_np = np.array(captured_image)
-        original_cv = cv2.cvtColor(img_np, cv2.COLOR_RGB2BGR)
-        return original_cv
+        return capture_buffers.grab(roi_coords)
     except Exception as e:
+        if isinstance(capture_buffers, MssCapture):
+            print(f"ADVERTENCIA: La captura con mss ha fallado ({e}). Se usará ImageGrab.")
+            capture_buffers = ImageGrabCapture()
+            return capture_and_preprocess(roi_coords)
         print(f"ERROR en la captura o el preprocesamiento: {e}")
         return None
 
-def perform_ocr(image):
+def capture_rois(coords_list):
+    """
+    Captura varias ROI con una sola llamada al motor de captura sobre la unión de todas
+    ellas y devuelve, para cada ROI, una vista del búfer sin copias adicionales.
+    Si las ROI están muy separadas (la unión es mucho mayor que su suma) se
+    capturan por separado para no copiar píxeles que nadie va a usar.
+    """
+    if not coords_list:
+        return []
+
+    union_x1 = min(c[0] for c in coords_list)
+    union_y1 = min(c[1] for c in coords_list)
+    union_x2 = max(c[2] for c in coords_list)
+    union_y2 = max(c[3] for c in coords_list)
+    union_area = (union_x2 - union_x1) * (union_y2 - union_y1)
+    rois_area = sum((c[2] - c[0]) * (c[3] - c[1]) for c in coords_list)
+
+    if len(coords_list) == 1 or union_area > rois_area * UNION_CAPTURE_MAX_OVERHEAD:
+        return [capture_and_preprocess(c) for c in coords_list]
+
+    frame = capture_and_preprocess((union_x1, union_y1, union_x2, union_y2))
+    if frame is None:
+        return [None] * len(coords_list)
+    return [frame[y1 - union_y1:y2 - union_y1, x1 - union_x1:x2 - union_x1] for x1, y1, x2, y2 in coords_list]
+
+def rects_overlap(a, b):
+    """Indica si dos rectángulos (x1, y1, x2, y2) se solapan."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def capture_window_rois(window, coords_list):
+    """
+    Captura el contenido de la ventana del juego con PrintWindow (solo Windows),
+    de modo que los recuadros superpuestos nunca salen en la imagen, y devuelve
+    una imagen RGB por ROI. Devuelve None si no es posible: otra plataforma, una ROI
+    fuera de la ventana o una imagen negra (juegos con aceleración que
+    PrintWindow no sabe leer); en ese caso se captura la pantalla.
+    """
+    if sys.platform != "win32" or window is None or not coords_list:
+        return None
+    hwnd = getattr(window, "_hWnd", None)
+    if hwnd is None:
+        return None
+
+    import ctypes
+    from ctypes import wintypes
+
+    user32 = ctypes.windll.user32
+    gdi32 = ctypes.windll.gdi32
+
+    rect = wintypes.RECT()
+    if not user32.GetWindowRect(hwnd, ctypes.byref(rect)):
+        return None
+    width, height = rect.right - rect.left, rect.bottom - rect.top
+    if width <= 0 or height <= 0:
+        return None
+    for x1, y1, x2, y2 in coords_list:
+        if x1 < rect.left or y1 < rect.top or x2 > rect.right or y2 > rect.bottom:
+            return None
+
+    class BITMAPINFOHEADER(ctypes.Structure):
+        _fields_ = [("biSize", wintypes.DWORD), ("biWidth", wintypes.LONG), ("biHeight", wintypes.LONG),
+                    ("biPlanes", wintypes.WORD), ("biBitCount", wintypes.WORD), ("biCompression", wintypes.DWORD),
+                    ("biSizeImage", wintypes.DWORD), ("biXPelsPerMeter", wintypes.LONG),
+                    ("biYPelsPerMeter", wintypes.LONG), ("biClrUsed", wintypes.DWORD), ("biClrImportant", wintypes.DWORD)]
+
+    PW_RENDERFULLCONTENT = 2
+    DIB_RGB_COLORS = 0
+
+    window_dc = user32.GetWindowDC(hwnd)
+    memory_dc = gdi32.CreateCompatibleDC(window_dc)
+    bitmap = gdi32.CreateCompatibleBitmap(window_dc, width, height)
+    previous_object = gdi32.SelectObject(memory_dc, bitmap)
+    try:
+        if not user32.PrintWindow(hwnd, memory_dc, PW_RENDERFULLCONTENT):
+            return None
+        header = BITMAPINFOHEADER(biSize=ctypes.sizeof(BITMAPINFOHEADER), biWidth=width,
+                                  biHeight=-height, biPlanes=1, biBitCount=32, biCompression=0)
+        buffer = capture_buffers.acquire((height, width, 4))
+        if not gdi32.GetDIBits(memory_dc, bitmap, 0, height, buffer.ctypes.data_as(ctypes.c_void_p),
+                               ctypes.byref(header), DIB_RGB_COLORS):
+            return None
+    finally:
+        gdi32.SelectObject(memory_dc, previous_object)
+        gdi32.DeleteObject(bitmap)
+        gdi32.DeleteDC(memory_dc)
+        user32.ReleaseDC(hwnd, window_dc)
+
+    views = [buffer[y1 - rect.top:y2 - rect.top, x1 - rect.left:x2 - rect.left, :3]
+             for x1, y1, x2, y2 in coords_list]
+    if not any(view.any() for view in views):
+        return None
+    # GetDIBits entrega BGRA; el resto del programa trabaja en RGB contiguo
+    return [np.ascontiguousarray(view[:, :, ::-1]) for view in views]
+
+def read_text_with_easyocr(image):
+    return [(res[0], res[1], float(res[2])) for res in get_easyocr_reader().readtext(image)]
+
+def read_text_with_tesseract(image):
+    """
+    Tesseract devuelve palabras sueltas: se agrupan por línea, con la caja que
+    las envuelve y la confianza media pasada a 0-1 como la de EasyOCR.
+    """
+    import pytesseract
+
+    languages = "+".join(TESSERACT_LANGUAGE_CODES.get(language, language) for language in OCR_LANGUAGES)
+    data = pytesseract.image_to_data(image, lang=languages, config=TESSERACT_CONFIG, output_type=pytesseract.Output.DICT)
+    lines = {}
+    for index, word in enumerate(data['text']):
+        confidence = float(data['conf'][index])
+        if not word.strip() or confidence < 0:
+            continue
+        key = (data['block_num'][index], data['par_num'][index], data['line_num'][index])
+        lines.setdefault(key, []).append((data['left'][index], data['top'][index], data['width'][index],
+                                          data['height'][index], word, confidence / 100))
+
+    results = []
+    for words in lines.values():
+        x1 = min(word[0] for word in words)
+        y1 = min(word[1] for word in words)
+        x2 = max(word[0] + word[2] for word in words)
+        y2 = max(word[1] + word[3] for word in words)
+        results.append(([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], " ".join(word[4] for word in words),
+                        sum(word[5] for word in words) / len(words)))
+    return results
+
+# Motores de OCR: cada uno devuelve una lista de (puntos de la caja, texto, confianza 0-1)
+OCR_ENGINES = {
+    "EasyOCR": {'available': EASYOCR_ENABLED, 'readtext': read_text_with_easyocr},
+    "Tesseract": {'available': TESSERACT_ENABLED, 'readtext': read_text_with_tesseract},
+}
+
+def mean_ocr_confidence(results):
+    """Confianza media de los fragmentos, ponderada por la longitud de cada texto."""
+    total_length = sum(len(text) for _, text, _ in results)
+    if not total_length:
+        return 0.0
+    return sum(len(text) * confidence for _, text, confidence in results) / total_length
+
+def perform_ocr(image, engine_mode=DEFAULT_OCR_ENGINE_MODE, incremental_state=None):
     """
     Realiza el reconocimiento de caracteres y devuelve el texto, así como
     las bounding boxes para calcular el tamaño de la fuente.
+    Prueba los motores del modo por orden y se queda con el primero cuya
+    confianza media alcanza OCR_TIER_MIN_CONFIDENCE (o con el último); los
+    fragmentos por debajo de OCR_MIN_FRAGMENT_CONFIDENCE se descartan.
+    Con incremental_state, EasyOCR reutiliza la detección anterior de la ROI.
     """
     if image is None:
         return "", []
+
+    engines = [engine for engine in OCR_ENGINE_MODES.get(engine_mode, ["EasyOCR"]) if OCR_ENGINES[engine]['available']]
+    engines = engines or ["EasyOCR"]
+    results = []
+    engine = engines[-1]
+    for tier, engine in enumerate(engines):
+        is_last_tier = tier == len(engines) - 1
+        start = time.perf_counter()
+        try:
+            if engine == "EasyOCR" and incremental_state is not None:
+                results = perform_incremental_ocr(image, incremental_state)
+            else:
+                results = OCR_ENGINES[engine]['readtext'](image)
+        except Exception as e:
+            print(f"ERROR en el OCR con {engine}: {e}")
+            results = []
+            if engine != "EasyOCR" and type(e).__name__ == "TesseractNotFoundError":
+                OCR_ENGINES[engine]['available'] = False # Falta el programa de Tesseract: no volver a intentarlo
+            continue
+        performance_metrics.record('ocr_engine', time.perf_counter() - start, backend=engine)
+        if is_last_tier or (results and mean_ocr_confidence(results) >= OCR_TIER_MIN_CONFIDENCE):
+            performance_metrics.increment('ocr_tier_accepted', backend=engine)
+            break
+        performance_metrics.increment('ocr_tier_fallbacks', backend=engine)
+
+    kept = [result for result in results if result[2] >= OCR_MIN_FRAGMENT_CONFIDENCE]
+    if len(kept) < len(results):
+        performance_metrics.increment('ocr_fragments_dropped', len(results) - len(kept), backend=engine)
+    return " ".join(text for _, text, _ in kept), [points for points, _, _ in kept]
+
+def preprocess_for_ocr(image, preset, previous_boxes=None, allow_crop=True):
+    """
+    Aplica un preajuste de OCR_PREPROCESS_PRESETS. El reescalado y el recorte se
+    basan en las cajas de texto de la captura anterior de la ROI (previous_boxes).
+    El recorte es solo vertical, con un margen de al menos una línea de texto:
+    una línea más larga que la anterior no queda cortada por los lados.
+    Devuelve la imagen y la transformación (escala, desplazamiento x, desplazamiento y)
+    para llevar las cajas detectadas de vuelta a coordenadas de la ROI.
+    """
+    import cv2
+
+    options = OCR_PREPROCESS_PRESETS.get(preset, {})
+    scale = 1.0
+    offset_x = offset_y = 0
+
+    if options.get("crop") and allow_crop and previous_boxes:
+        ys = [p[1] for box in previous_boxes for p in box]
+        height = image.shape[0]
+        line_height = max(max(p[1] for p in box) - min(p[1] for p in box) for box in previous_boxes)
+        margin = max(OCR_CROP_MARGIN, int(line_height))
+        offset_y = max(0, int(min(ys)) - margin)
+        crop_y2 = min(height, int(max(ys)) + margin)
+        if crop_y2 > offset_y:
+            image = image[offset_y:crop_y2]
+        else:
+            offset_y = 0
+
+    if options.get("grayscale") and image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+
+    if options.get("resize") and previous_boxes:
+        text_heights = sorted(max(p[1] for p in box) - min(p[1] for p in box) for box in previous_boxes)
+        median_height = text_heights[len(text_heights) // 2]
+        if median_height > 0:
+            # Solo se reduce: ampliar la imagen haría más lento el OCR
+            scale = max(OCR_MIN_SCALE, min(1.0, OCR_TARGET_TEXT_HEIGHT / median_height))
+            if scale < 0.95:
+                image = cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            else:
+                scale = 1.0
+
+    if options.get("binarize"):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        image = cv2.adaptiveThreshold(image, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 31, 10)
+
+    return image, (scale, offset_x, offset_y)
+
+class IncrementalOCRState:
+    """Cajas detectadas en una ROI y el último fotograma en grises, para el OCR incremental."""
+
+    def __init__(self):
+        self.gray = None
+        self.boxes = [] # {'horizontal' o 'free': caja de EasyOCR, 'bbox': (x1, y1, x2, y2), 'results': [(puntos, texto, confianza)]}
+
+def detect_text_boxes(reader, image):
+    """Ejecuta solo la detección de EasyOCR (CRAFT) y devuelve las cajas encontradas."""
+    horizontal_list, free_list = reader.detect(image)
+    boxes = []
+    for x_min, x_max, y_min, y_max in horizontal_list[0]:
+        boxes.append({'horizontal': [x_min, x_max, y_min, y_max], 'bbox': (max(0, x_min), max(0, y_min), x_max, y_max)})
+    for points in free_list[0]:
+        xs = [point[0] for point in points]
+        ys = [point[1] for point in points]
+        boxes.append({'free': points, 'bbox': (max(0, int(min(xs))), max(0, int(min(ys))), int(max(xs)), int(max(ys)))})
+    return boxes
+
+def recognize_text_box(reader, gray, box):
+    """Ejecuta solo el reconocimiento sobre una caja ya detectada."""
+    results = reader.recognize(gray, horizontal_list=[box['horizontal']] if 'horizontal' in box else [],
+                               free_list=[box['free']] if 'free' in box else [])
+    box['results'] = [(result[0], result[1], float(result[2])) for result in results]
+
+def expanded_bbox(box, shape):
+    x1, y1, x2, y2 = box['bbox']
+    margin = INCREMENTAL_OCR_BOX_MARGIN
+    return max(0, x1 - margin), max(0, y1 - margin), min(shape[1], x2 + margin), min(shape[0], y2 + margin)
+
+def has_glyph_sized_change(outside, boxes):
+    """
+    Indica si alguna componente conexa de píxeles cambiados fuera de las cajas
+    tiene al menos el tamaño de un carácter. El umbral es absoluto (depende de la
+    altura del texto, no del tamaño de la ROI): una palabra nueva junto a una
+    línea larga cuenta igual que en una ROI pequeña, y el ruido suelto no cuenta.
+    """
+    import cv2
+
+    if not outside.any():
+        return False
+    heights = [box['bbox'][3] - box['bbox'][1] for box in boxes]
+    text_height = float(np.median(heights)) if heights else INCREMENTAL_OCR_DEFAULT_TEXT_HEIGHT
+    min_area = max(1, int((text_height * INCREMENTAL_OCR_MIN_GLYPH_FRACTION) ** 2))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(outside.view(np.uint8), connectivity=8)
+    return count > 1 and int(stats[1:, cv2.CC_STAT_AREA].max()) >= min_area
+
+def perform_incremental_ocr(image, state):
+    """
+    OCR que reutiliza la detección anterior de la ROI. Solo se vuelven a
+    reconocer las cajas cuyos píxeles han cambiado; la detección completa se
+    repite cuando cambia el diseño (algo del tamaño de un carácter fuera de las
+    cajas conocidas, por ejemplo una línea que crece o una caja que se mueve) o el
+    tamaño. El fotograma de referencia solo avanza en las zonas que se han vuelto
+    a leer, así los cambios pequeños fuera de las cajas se van sumando.
+    Devuelve los fragmentos como read_text_with_easyocr.
+    """
+    import cv2
+
     try:
-        results = easyocr_reader.readtext(image)
-        extracted_text = " ".join([res[1] for res in results])
-        bounding_boxes = [res[0] for res in results]
-        return extracted_text, bounding_boxes
-    except Exception as e:
-        print(f"ERROR en el OCR con EasyOCR: {e}")
+        reader = get_easyocr_reader()
+        # Los preajustes en grises (y el binarizado) ya entregan una imagen de un canal
+        gray = image if image.ndim == 2 else cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+
+        layout_changed = state.gray is None or state.gray.shape != gray.shape
+        changed = None
+        if not layout_changed:
+            changed = cv2.absdiff(gray, state.gray) > INCREMENTAL_OCR_PIXEL_THRESHOLD
+            outside = changed.copy()
+            for box in state.boxes:
+                x1, y1, x2, y2 = expanded_bbox(box, gray.shape)
+                outside[y1:y2, x1:x2] = False
+            layout_changed = has_glyph_sized_change(outside, state.boxes)
+
+        if layout_changed:
+            performance_metrics.increment('ocr_detections')
+            state.boxes = detect_text_boxes(reader, image)
+            boxes_to_recognize = state.boxes
+        else:
+            boxes_to_recognize = []
+            for box in state.boxes:
+                x1, y1, x2, y2 = expanded_bbox(box, gray.shape)
+                if changed[y1:y2, x1:x2].any():
+                    boxes_to_recognize.append(box)
+                else:
+                    performance_metrics.increment('ocr_boxes_reused')
+
+        for box in boxes_to_recognize:
+            recognize_text_box(reader, gray, box)
+        if layout_changed:
+            # La imagen puede ser un búfer de captura que se reutiliza: la referencia es una copia
+            state.gray = gray.copy() if gray is image else gray
+        else:
+            for box in boxes_to_recognize:
+                x1, y1, x2, y2 = expanded_bbox(box, gray.shape)
+                state.gray[y1:y2, x1:x2] = gray[y1:y2, x1:x2]
+    except Exception:
+        # La próxima captura hará una detección completa
+        state.gray = None
+        raise
+
+    return [result for box in state.boxes for result in box['results']]
+
+def perform_ocr_with_preset(image, preset=DEFAULT_OCR_PREPROCESS_PRESET, previous_boxes=None, incremental_state=None,
+                            engine_mode=DEFAULT_OCR_ENGINE_MODE):
+    """
+    Preprocesa la imagen con el preajuste indicado, ejecuta el OCR y devuelve las
+    cajas en coordenadas de la ROI original. Si un preajuste con recorte no encuentra
+    texto (el texto puede haberse movido) o alguna caja toca el borde del recorte
+    (el texto sigue fuera de él), se repite el OCR sin recortar.
+    Con incremental_state se reutiliza la detección anterior de la ROI; los
+    preajustes con recorte cambian la imagen en cada captura y no lo admiten.
+    """
+    if image is None:
         return "", []
 
+    processed_image, (scale, offset_x, offset_y) = preprocess_for_ocr(image, preset, previous_boxes)
+    if OCR_PREPROCESS_PRESETS.get(preset, {}).get("crop"):
+        incremental_state = None
+    extracted_text, bounding_boxes = perform_ocr(processed_image, engine_mode, incremental_state)
+    crop_y2 = offset_y + processed_image.shape[0] / scale
+    if OCR_PREPROCESS_PRESETS.get(preset, {}).get("crop") and previous_boxes and (
+            not extracted_text or boxes_touch_crop_edge(bounding_boxes, scale, offset_y, crop_y2, image.shape[0])):
+        processed_image, (scale, offset_x, offset_y) = preprocess_for_ocr(image, preset, previous_boxes, allow_crop=False)
+        extracted_text, bounding_boxes = perform_ocr(processed_image, engine_mode)
+
+    if scale != 1.0 or offset_x or offset_y:
+        bounding_boxes = [[[p[0] / scale + offset_x, p[1] / scale + offset_y] for p in box] for box in bounding_boxes]
+    return extracted_text, bounding_boxes
+
+def boxes_touch_crop_edge(bounding_boxes, scale, crop_y1, crop_y2, image_height):
+    """
+    Indica si alguna caja (en coordenadas de la imagen preprocesada) llega al borde
+    superior o inferior del recorte sin que ese borde sea el de la ROI.
+    """
+    tolerance = OCR_CROP_EDGE_TOLERANCE
+    for box in bounding_boxes:
+        top = min(p[1] for p in box) / scale + crop_y1
+        bottom = max(p[1] for p in box) / scale + crop_y1
+        if (crop_y1 > 0 and top - crop_y1 <= tolerance) or (crop_y2 < image_height and crop_y2 - bottom <= tolerance):
+            return True
+    return False
+
+def next_reference_boxes(preset, previous_boxes, new_boxes):
+    """
+    Decide qué cajas se guardan como referencia para el siguiente recorte de la ROI.
+    Con los preajustes que recortan, unas cajas que caben dentro de la franja
+    anterior no la sustituyen: una línea corta no debe estrechar el recorte de la
+    siguiente, que puede ser más larga o tener más líneas.
+    """
+    if not new_boxes:
+        return previous_boxes
+    if not previous_boxes or not OCR_PREPROCESS_PRESETS.get(preset, {}).get("crop"):
+        return new_boxes
+    previous_ys = [p[1] for box in previous_boxes for p in box]
+    new_ys = [p[1] for box in new_boxes for p in box]
+    if min(new_ys) >= min(previous_ys) and max(new_ys) <= max(previous_ys):
+        return previous_boxes
+    return new_boxes
+
+def compute_frame_signature(image):
+    """
+    Reduce el fotograma a una miniatura en escala de grises con una celda por
+    cada FRAME_DIFF_CELL_PX píxeles. Compararla es mucho más barato que lanzar
+    el OCR sobre la imagen completa, y las celdas son lo bastante pequeñas para
+    que una letra nueva cambie alguna casi por completo.
+    """
+    import cv2
+
+    gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+    height, width = gray.shape
+    size = (max(1, width // FRAME_DIFF_CELL_PX), max(1, height // FRAME_DIFF_CELL_PX))
+    thumbnail = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return thumbnail.astype(np.int16)
+
+def frame_has_changed(previous_signature, new_signature):
+    """
+    Indica si al menos FRAME_DIFF_MIN_CHANGED_CELLS celdas han cambiado más que
+    FRAME_DIFF_CELL_THRESHOLD. A diferencia de la media de toda la miniatura, no
+    se diluye cuando solo aparecen unas letras en una ROI grande.
+    """
+    if previous_signature is None or previous_signature.shape != new_signature.shape:
+        return True
+    changed_cells = np.count_nonzero(np.abs(new_signature - previous_signature) > FRAME_DIFF_CELL_THRESHOLD)
+    return changed_cells >= FRAME_DIFF_MIN_CHANGED_CELLS
+
 def calculate_font_size_from_bbox(bounding_boxes):
     """Calcula un tamaño de fuente en puntos basado en la altura de los bounding boxes."""
     if not bounding_boxes:
@@ -217,33 +1210,80 @@ def translate_with_google_translate(text):
         return ""
 
     try:
-        translated = google_translator.translate(text, dest='es')
+        translated = get_google_translator().translate(text, dest=TRANSLATION_TARGET_LANGUAGE)
         return translated.text
     except Exception as e:
         print(f"ERROR en la traducción con Google Translate: {e}")
         return "[ERROR en la traducción con Google Translate]"
 
-def translate_with_ollama(text, retry_count=0):
+def read_ollama_stream(payload, on_partial):
+    """
+    Lee el flujo NDJSON de Ollama (un objeto JSON por línea) y va entregando el
+    texto acumulado a on_partial a medida que se genera. Devuelve el texto completo.
+    """
+    chunks = []
+    last_update = 0.0
+    with get_ollama_session().post(OLLAMA_API_URL, json=payload, stream=True, timeout=OLLAMA_REQUEST_TIMEOUT_S) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if 'error' in chunk:
+                raise RuntimeError(chunk['error'])
+            chunks.append(chunk.get('response', ""))
+            if chunk.get('done'):
+                break
+            now = time.monotonic()
+            if now - last_update >= OLLAMA_STREAM_UPDATE_INTERVAL_S:
+                last_update = now
+                partial_text = "".join(chunks).strip()
+                if partial_text:
+                    on_partial(partial_text)
+    return "".join(chunks)
+
+def ollama_num_predict(text):
+    """Límite de tokens de la respuesta, proporcional a la longitud del texto original."""
+    return min(OLLAMA_NUM_PREDICT_MAX, OLLAMA_NUM_PREDICT_MIN + int(len(text) * OLLAMA_NUM_PREDICT_PER_CHAR))
+
+def build_ollama_payload(prompt, stream, num_predict, stop):
+    """Petición a /api/generate; con OLLAMA_TUNED_GENERATION añade el prompt de sistema y las opciones de generación."""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": stream,
+        "keep_alive": OLLAMA_KEEP_ALIVE
+    }
+    if OLLAMA_TUNED_GENERATION:
+        payload["system"] = OLLAMA_SYSTEM_PROMPT
+        payload["options"] = {"num_predict": num_predict, "stop": stop, "temperature": 0}
+    return payload
+
+def translate_with_ollama(text, retry_count=0, on_partial=None):
     """
     Envía el texto extraído a la API local de Ollama para su traducción.
-    Si el servidor no responde, intenta iniciarlo una vez.
+    Si se indica on_partial, la respuesta se recibe en streaming y se le pasa
+    el texto parcial según se genera. Si el servidor no responde, intenta iniciarlo una vez.
     """
     if not text:
         return ""
 
-    prompt = f"Traduce el siguiente texto al español de forma concisa y sin rodeos: '{text}'"
+    if OLLAMA_TUNED_GENERATION:
+        # Las instrucciones van en el prompt de sistema: el texto es lo único que cambia
+        prompt = text
+    else:
+        prompt = f"Traduce el siguiente texto al español de forma concisa y sin rodeos: '{text}'"
 
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False
-    }
+    payload = build_ollama_payload(prompt, on_partial is not None, ollama_num_predict(text), OLLAMA_STOP_SEQUENCES)
 
     try:
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=60)
-        response.raise_for_status()
-        result = response.json()
-        translation = result['response'].strip()
+        if on_partial is None:
+            response = get_ollama_session().post(OLLAMA_API_URL, json=payload, timeout=OLLAMA_REQUEST_TIMEOUT_S)
+            response.raise_for_status()
+            result = response.json()
+            translation = result['response'].strip()
+        else:
+            translation = read_ollama_stream(payload, on_partial).strip()
         
         # Limpiar la respuesta para que no contenga explicaciones
         if "traducción" in translation.lower() or "aquí está" in translation.lower():
@@ -256,9 +1296,7 @@ def translate_with_ollama(text, retry_count=0):
             print("No se pudo conectar a Ollama. Intentando iniciar el servidor...")
             if start_ollama_server():
                 print("Servidor de Ollama iniciado. Reintentando la traducción...")
-                # Esperar un poco más para que el servidor esté listo
-                time.sleep(5)
-                return translate_with_ollama(text, retry_count=1)
+                return translate_with_ollama(text, retry_count=1, on_partial=on_partial)
             else:
                 return "[ERROR: No se pudo conectar a Ollama. Asegúrate de que Ollama está instalado y en el PATH.]"
         else:
@@ -270,6 +1308,1074 @@ def translate_with_ollama(text, retry_count=0):
         print(f"ERROR al procesar la respuesta de Ollama: {e}")
         return "[ERROR en la traducción]"
 
+BATCH_SEGMENT_PATTERN = re.compile(r"^\s*\[(\d+)\]\s*(.*)$")
+
+def build_numbered_segments(texts):
+    """Une varios textos en un único bloque con un segmento numerado por línea: [1] ..., [2] ..."""
+    return "\n".join(f"[{number}] {' '.join(text.split())}" for number, text in enumerate(texts, start=1))
+
+def split_numbered_segments(response_text, expected_count):
+    """
+    Reparte una respuesta con segmentos numerados entre los textos originales.
+    Devuelve None si falta algún número o algún segmento está vacío.
+    """
+    segments = {}
+    for line in response_text.splitlines():
+        match = BATCH_SEGMENT_PATTERN.match(line)
+        if match:
+            number = int(match.group(1))
+            if 1 <= number <= expected_count and number not in segments:
+                segments[number] = match.group(2).strip()
+    if len(segments) != expected_count or not all(segments.values()):
+        return None
+    return [segments[number] for number in range(1, expected_count + 1)]
+
+def translate_batch_with_google_translate(texts):
+    """Traduce varios textos con una sola petición a Google Translate. Devuelve None si falla."""
+    try:
+        translated = get_google_translator().translate(build_numbered_segments(texts), dest=TRANSLATION_TARGET_LANGUAGE)
+        return split_numbered_segments(translated.text, len(texts))
+    except Exception as e:
+        print(f"ERROR en la traducción agrupada con Google Translate: {e}")
+        return None
+
+def translate_batch_with_ollama(texts):
+    """Traduce varios textos con una sola petición a Ollama. Devuelve None si falla."""
+    prompt = ("Traduce al español cada uno de los siguientes segmentos numerados de forma concisa y sin rodeos. "
+              "Responde únicamente con las traducciones, una por línea, empezando cada una por su número entre corchetes.\n\n"
+              + build_numbered_segments(texts))
+
+    # La respuesta termina en cuanto el modelo intenta inventar un segmento más
+    num_predict = sum(ollama_num_predict(text) for text in texts)
+    payload = build_ollama_payload(prompt, False, num_predict, ["\n\n\n", f"[{len(texts) + 1}]", "\nNota", "\nNote"])
+
+    try:
+        response = get_ollama_session().post(OLLAMA_API_URL, json=payload, timeout=OLLAMA_REQUEST_TIMEOUT_S)
+        response.raise_for_status()
+        return split_numbered_segments(response.json()['response'], len(texts))
+    except Exception as e:
+        print(f"ERROR en la traducción agrupada con Ollama: {e}")
+        return None
+
+def is_translation_error(translated_text):
+    """Indica si el texto devuelto por un traductor es un mensaje de error."""
+    return translated_text.startswith("[ERROR") or translated_text.startswith("[Error")
+
+def normalize_source_text(text):
+    """Normaliza el texto de origen (espacios) para usarlo como clave de la caché."""
+    return " ".join(text.split())
+
+def normalize_ocr_text(text):
+    """
+    Forma canónica de una lectura del OCR para compararla con otras: minúsculas,
+    sin puntuación y con los caracteres que el OCR confunde reducidos a uno solo.
+    Se conservan los espacios entre palabras, y las palabras que son sobre todo
+    cifras se dejan tal cual para que "10" y "15" nunca coincidan.
+    """
+    tokens = []
+    for word in text.casefold().split():
+        token = "".join(character for character in word if character.isalnum() or character == "|")
+        digits = sum(character.isdigit() for character in token)
+        letters = sum(character.isalpha() for character in token)
+        if digits and letters <= digits:
+            token = "".join(character for character in token if character.isalnum())
+        else:
+            for sequence, replacement in OCR_CONFUSABLE_SEQUENCES:
+                token = token.replace(sequence, replacement)
+            token = token.translate(OCR_CONFUSABLE_CHARACTERS)
+            token = "".join(character for character in token if character.isalnum())
+        if token:
+            tokens.append(token)
+    return " ".join(tokens)
+
+def normalized_texts_match(a, b):
+    """
+    Compara dos textos ya normalizados con normalize_ocr_text. Solo son iguales
+    si coinciden palabra a palabra: el único ruido que se tolera es el que ya
+    absorbe la normalización, así que cualquier otra sustitución es un cambio real.
+    """
+    return a == b
+
+def is_text_growing(text, previous_text):
+    """
+    Indica si text es previous_text con más caracteres al final: la línea sigue
+    apareciendo letra a letra aunque el principio coincida con la lectura anterior.
+    """
+    normalized_text = normalize_ocr_text(text)
+    normalized_previous = normalize_ocr_text(previous_text)
+    return len(normalized_text) > len(normalized_previous) and normalized_text.startswith(normalized_previous)
+
+def is_same_line(text, previous_text):
+    """
+    Indica si dos lecturas del OCR corresponden a la misma línea aunque difieran
+    en mayúsculas, espacios, puntuación o en caracteres que el OCR confunde.
+    """
+    return normalized_texts_match(normalize_ocr_text(text), normalize_ocr_text(previous_text))
+
+class FuzzyTranslationMemory:
+    """
+    Memoria de traducción aproximada: guarda las traducciones por la forma
+    canónica del texto (normalize_ocr_text), de modo que una relectura con ruido
+    del OCR encuentra la traducción de la línea original con una sola consulta.
+    """
+
+    def __init__(self, max_entries=FUZZY_MEMORY_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (espacio de nombres, texto normalizado) -> traducción
+        self.lock = threading.Lock()
+
+    def add(self, namespace, text, translation):
+        normalized_text = normalize_ocr_text(text)
+        if not normalized_text:
+            return
+        key = (namespace, normalized_text)
+        with self.lock:
+            self.entries[key] = translation
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def lookup(self, namespace, text):
+        """Devuelve la traducción de la línea guardada equivalente, o None."""
+        key = (namespace, normalize_ocr_text(text))
+        with self.lock:
+            translation = self.entries.get(key)
+            if translation is not None:
+                self.entries.move_to_end(key)
+            return translation
+
+class TranslationCache:
+    """
+    Caché de traducciones de dos niveles: una LRU en memoria y una tabla SQLite
+    en disco que persiste entre sesiones. La clave es el texto normalizado,
+    el idioma de destino, el motor y el modelo. Si no hay una entrada exacta se
+    consulta una memoria aproximada que tolera el ruido del OCR.
+    """
+
+    EVICTION_CHECK_INTERVAL = 100  # Comprobar el tamaño en disco cada N inserciones
+
+    def __init__(self, path, memory_entries, disk_max_entries):
+        self.memory_entries = memory_entries
+        self.disk_max_entries = disk_max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.fuzzy_hits = 0
+        self.misses = 0
+        self.puts_since_eviction = 0
+        self.fuzzy_memory = FuzzyTranslationMemory()
+        self.fallback_aliases = OrderedDict() # clave del motor pedido -> (traducción del respaldo, caducidad)
+        self.connection = None
+        try:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " source TEXT NOT NULL, target_language TEXT NOT NULL, engine TEXT NOT NULL, model TEXT NOT NULL,"
+                " translation TEXT NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (source, target_language, engine, model))"
+            )
+            self.connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            self.connection.commit()
+        except sqlite3.Error as e:
+            print(f"ADVERTENCIA: No se pudo abrir la caché de traducciones en disco ({e}). Solo se usará la memoria.")
+            self.connection = None
+
+        if self.connection is not None:
+            threading.Thread(target=self._load_fuzzy_memory, name="carga-memoria-aproximada", daemon=True).start()
+
+    def _load_fuzzy_memory(self):
+        """Indexa en segundo plano las traducciones usadas más recientemente en sesiones anteriores."""
+        with self.lock:
+            if self.connection is None:
+                return
+            try:
+                rows = self.connection.execute(
+                    "SELECT source, target_language, engine, model, translation FROM translations"
+                    " ORDER BY last_used DESC LIMIT ?", (self.fuzzy_memory.max_entries,)
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"ERROR al cargar la memoria de traducción aproximada: {e}")
+                return
+        # Las más antiguas primero, para que las recientes queden al final de la LRU
+        for source, target_language, engine, model, translation in reversed(rows):
+            self.fuzzy_memory.add((target_language, engine, model), source, translation)
+
+    def get(self, text, target_language, engine, model):
+        key = (normalize_source_text(text), target_language, engine, model)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return self.memory[key]
+
+            alias = self.fallback_aliases.get(key)
+            if alias is not None:
+                if alias[1] > time.monotonic():
+                    self.memory_hits += 1
+                    return alias[0]
+                del self.fallback_aliases[key]
+
+            if self.connection is not None:
+                try:
+                    row = self.connection.execute(
+                        "SELECT translation FROM translations"
+                        " WHERE source = ? AND target_language = ? AND engine = ? AND model = ?", key
+                    ).fetchone()
+                    if row is not None:
+                        self.connection.execute(
+                            "UPDATE translations SET last_used = ?"
+                            " WHERE source = ? AND target_language = ? AND engine = ? AND model = ?", (time.time(),) + key
+                        )
+                        self.connection.commit()
+                        self._remember(key, row[0])
+                        self.disk_hits += 1
+                        return row[0]
+                except sqlite3.Error as e:
+                    print(f"ERROR al leer la caché de traducciones: {e}")
+
+        fuzzy_translation = self.fuzzy_memory.lookup(key[1:], text)
+        with self.lock:
+            if fuzzy_translation is not None:
+                self.fuzzy_hits += 1
+            else:
+                self.misses += 1
+        return fuzzy_translation
+
+    def put(self, text, target_language, engine, model, translation):
+        key = (normalize_source_text(text), target_language, engine, model)
+        self.fuzzy_memory.add(key[1:], text, translation)
+        with self.lock:
+            self._remember(key, translation)
+            if self.connection is None:
+                return
+            try:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO translations"
+                    " (source, target_language, engine, model, translation, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    key + (translation, time.time())
+                )
+                self.puts_since_eviction += 1
+                if self.puts_since_eviction >= self.EVICTION_CHECK_INTERVAL:
+                    self.puts_since_eviction = 0
+                    self._evict_disk()
+                self.connection.commit()
+            except sqlite3.Error as e:
+                print(f"ERROR al escribir en la caché de traducciones: {e}")
+
+    def put_fallback_alias(self, text, target_language, engine, model, translation):
+        """
+        Recuerda durante TRANSLATION_FALLBACK_ALIAS_TTL_S, solo en memoria, la
+        traducción que dio el respaldo para una línea pedida a otro motor. No se
+        escribe en disco: allí cada traducción queda bajo el motor que la produjo.
+        """
+        key = (normalize_source_text(text), target_language, engine, model)
+        with self.lock:
+            self.fallback_aliases[key] = (translation, time.monotonic() + TRANSLATION_FALLBACK_ALIAS_TTL_S)
+            self.fallback_aliases.move_to_end(key)
+            while len(self.fallback_aliases) > self.memory_entries:
+                self.fallback_aliases.popitem(last=False)
+
+    def _remember(self, key, translation):
+        self.memory[key] = translation
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        """Elimina las entradas menos usadas recientemente si la tabla supera el máximo."""
+        count = self.connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM translations WHERE rowid IN"
+                " (SELECT rowid FROM translations ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+
+    def stats_summary(self):
+        with self.lock:
+            hits = self.memory_hits + self.disk_hits + self.fuzzy_hits
+            return (f"Caché de traducciones: {hits} aciertos (memoria {self.memory_hits}, disco {self.disk_hits}, "
+                    f"aproximados {self.fuzzy_hits}), "
+                    f"{self.misses} fallos, {len(self.memory)} entradas en memoria.")
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+translation_cache = None
+translation_cache_lock = threading.Lock()
+
+def get_translation_cache():
+    """
+    Devuelve la caché de traducciones, abriéndola la primera vez. Así los procesos
+    de OCR, que vuelven a importar este archivo, no abren la base de datos ni
+    lanzan la carga de la memoria aproximada.
+    """
+    global translation_cache
+    with translation_cache_lock:
+        if translation_cache is None:
+            translation_cache = TranslationCache(TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MEMORY_ENTRIES,
+                                                 TRANSLATION_CACHE_DISK_MAX_ENTRIES)
+        return translation_cache
+
+# --- Motor de traducción ---
+# Registro de motores: para añadir uno basta con su función de traducción, la
+# agrupada (opcional) y el modelo, que forma parte de la clave de la caché
+TRANSLATION_BACKENDS = {
+    "Google Translate": {
+        'available': GOOGLE_TRANSLATE_ENABLED,
+        'translate': lambda text, on_partial=None: translate_with_google_translate(text),
+        'translate_batch': translate_batch_with_google_translate,
+        'model': "",
+    },
+    "Ollama": {
+        'available': OLLAMA_ENABLED,
+        'translate': lambda text, on_partial=None: translate_with_ollama(text, on_partial=on_partial),
+        'translate_batch': translate_batch_with_ollama,
+        'model': OLLAMA_MODEL if OLLAMA_ENABLED else "",
+    },
+}
+
+class TranslationEngine:
+    """
+    Ejecuta las peticiones a los motores en un grupo de hilos, con un límite de
+    peticiones simultáneas y un tiempo máximo por motor. Si el motor elegido no
+    responde antes del percentil TRANSLATION_HEDGE_PERCENTILE de sus tiempos
+    recientes, la misma línea se pide también al motor de respaldo y se usa la
+    primera respuesta válida. Así los casos lentos no bloquean la lectura.
+    """
+
+    def __init__(self, backends=TRANSLATION_BACKENDS, max_workers=TRANSLATION_ENGINE_THREADS):
+        self.backends = backends
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="motor-traduccion")
+        self.semaphores = {name: threading.BoundedSemaphore(TRANSLATION_BACKEND_LIMITS.get(name, 1)) for name in backends}
+        self.hedging_enabled = True
+
+    def timeout(self, backend):
+        return TRANSLATION_BACKEND_TIMEOUTS_S.get(backend, 60)
+
+    def hedge_delay(self, backend):
+        """Tiempo de espera antes de pedir la línea también al motor de respaldo."""
+        p95 = performance_metrics.percentile('backend', TRANSLATION_HEDGE_PERCENTILE, backend=backend)
+        if p95 is None:
+            return TRANSLATION_HEDGE_DEFAULT_DELAY_S
+        return max(TRANSLATION_HEDGE_MIN_DELAY_S, p95)
+
+    def hedge_backend(self, backend):
+        fallback = TRANSLATION_HEDGE_FALLBACKS.get(backend)
+        if self.hedging_enabled and fallback in self.backends and self.backends[fallback]['available']:
+            return fallback
+        return None
+
+    def run(self, backend, function, *args):
+        """Se ejecuta en el grupo de hilos: respeta el límite del motor y mide su tiempo."""
+        with self.semaphores[backend]:
+            start = time.perf_counter()
+            try:
+                result = function(*args)
+            except Exception as e:
+                print(f"ERROR en el motor {backend}: {e}")
+                result = f"[ERROR en el motor {backend}]"
+            performance_metrics.record('backend', time.perf_counter() - start, backend=backend)
+        if result is None or (isinstance(result, str) and is_translation_error(result)):
+            performance_metrics.increment('backend_errors', backend=backend)
+        return result
+
+    def translate(self, text, backend, on_partial=None):
+        """
+        Traduce una línea. Devuelve (traducción, motor que la ha producido); el
+        motor puede ser el de respaldo si ha respondido antes.
+        """
+        if backend not in self.backends:
+            return "[Error: Traductor no seleccionado]", backend
+
+        # Los parciales del motor principal se descartan en cuanto hay un resultado final
+        partial_lock = threading.Lock()
+        finished = False
+
+        def guarded_partial(partial_text):
+            with partial_lock:
+                if not finished:
+                    on_partial(partial_text)
+
+        primary = self.executor.submit(self.run, backend, self.backends[backend]['translate'], text,
+                                       guarded_partial if on_partial else None)
+        futures = {primary: backend}
+        deadline = time.monotonic() + self.timeout(backend)
+
+        fallback = self.hedge_backend(backend)
+        if fallback is not None:
+            done, _ = wait([primary], timeout=min(self.hedge_delay(backend), self.timeout(backend)))
+            if not done:
+                performance_metrics.increment('hedged_requests')
+                futures[self.executor.submit(self.run, fallback, self.backends[fallback]['translate'], text, None)] = fallback
+                deadline = max(deadline, time.monotonic() + self.timeout(fallback))
+
+        result = None
+        while futures:
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                used_backend = futures.pop(future)
+                translated_text = future.result()
+                if translated_text and not is_translation_error(translated_text):
+                    with partial_lock:
+                        finished = True
+                    if used_backend != backend:
+                        performance_metrics.increment('hedge_wins')
+                    return translated_text, used_backend
+                result = (translated_text, used_backend)
+
+        with partial_lock:
+            finished = True
+        if result is None:
+            performance_metrics.increment('backend_errors', backend=backend)
+            return f"[ERROR: {backend} no respondió en {self.timeout(backend)} s]", backend
+        return result
+
+    def translate_batch(self, texts, backend):
+        """Traducción agrupada, sin respaldo. Devuelve None si falla o si vence el tiempo."""
+        translate_batch = self.backends.get(backend, {}).get('translate_batch')
+        if translate_batch is None:
+            return None
+        future = self.executor.submit(self.run, backend, translate_batch, texts)
+        try:
+            return future.result(timeout=self.timeout(backend))
+        except FutureTimeoutError:
+            performance_metrics.increment('backend_errors', backend=backend)
+            return None
+
+translation_engine = TranslationEngine()
+
+def get_translator_model(translator):
+    """Devuelve el modelo usado por el motor de traducción (forma parte de la clave de la caché)."""
+    return TRANSLATION_BACKENDS.get(translator, {}).get('model', "")
+
+def translate_text(text, translator, on_partial=None):
+    """
+    Traduce el texto con el motor indicado, consultando primero la caché.
+    Un acierto evita por completo la llamada al traductor. on_partial recibe
+    el texto parcial si el motor admite streaming (Ollama).
+    """
+    if not text:
+        return ""
+
+    cached = get_translation_cache().get(text, TRANSLATION_TARGET_LANGUAGE, translator, get_translator_model(translator))
+    if cached is not None:
+        performance_metrics.increment('cache_hits')
+        return cached
+    performance_metrics.increment('cache_misses')
+    return translate_uncached(text, translator, on_partial=on_partial)
+
+def translate_uncached(text, translator, on_partial=None):
+    """
+    Traduce el texto con el motor indicado y guarda el resultado en la caché solo
+    bajo el motor que lo ha producido (puede ser el de respaldo). Si fue el
+    respaldo, la línea se recuerda un rato bajo el motor pedido sin escribirla en
+    disco, para no volver a esperar al motor lento mientras dure la sesión.
+    """
+    translated_text, used_backend = translation_engine.translate(text, translator, on_partial=on_partial)
+    if translated_text and not is_translation_error(translated_text):
+        cache = get_translation_cache()
+        cache.put(text, TRANSLATION_TARGET_LANGUAGE, used_backend, get_translator_model(used_backend), translated_text)
+        if used_backend != translator:
+            cache.put_fallback_alias(text, TRANSLATION_TARGET_LANGUAGE, translator, get_translator_model(translator),
+                                     translated_text)
+    return translated_text
+
+def lookup_cached_translations(texts, translator):
+    """
+    Busca cada texto en la caché. Devuelve las traducciones encontradas (""
+    donde no hay) y los índices de los textos que hay que traducir.
+    """
+    model = get_translator_model(translator)
+    results = [""] * len(texts)
+    pending = []
+    for index, text in enumerate(texts):
+        if not text:
+            continue
+        cached = get_translation_cache().get(text, TRANSLATION_TARGET_LANGUAGE, translator, model)
+        if cached is not None:
+            performance_metrics.increment('cache_hits')
+            results[index] = cached
+        else:
+            performance_metrics.increment('cache_misses')
+            pending.append(index)
+    return results, pending
+
+def translate_texts(texts, translator):
+    """
+    Traduce varios textos con una sola petición al motor; los aciertos de la
+    caché no se envían. Si la respuesta no se puede repartir entre los textos,
+    se traducen uno a uno.
+    """
+    results, pending = lookup_cached_translations(texts, translator)
+    return translate_pending_texts(texts, pending, translator, results)
+
+def translate_pending_texts(texts, pending, translator, results):
+    """Traduce los textos de los índices pending y completa results con sus traducciones."""
+    model = get_translator_model(translator)
+    batch_results = None
+    if len(pending) > 1:
+        batch_results = translation_engine.translate_batch([texts[index] for index in pending], translator)
+        if batch_results is None:
+            print("ADVERTENCIA: No se pudo repartir la traducción agrupada; se traduce cada texto por separado.")
+
+    if batch_results is not None:
+        for index, translated_text in zip(pending, batch_results):
+            results[index] = translated_text
+            get_translation_cache().put(texts[index], TRANSLATION_TARGET_LANGUAGE, translator, model, translated_text)
+    else:
+        for index in pending:
+            results[index] = translate_uncached(texts[index], translator)
+    return results
+
+def is_sentence_boundary(sentence, next_character):
+    """
+    Indica si la frase termina de verdad en su último signo. Los puntos suspensivos
+    ("Bueno... gracias"), las abreviaturas ("Mr. Smith") y un punto seguido de
+    minúscula no cortan la frase; los signos japoneses siempre la cortan.
+    """
+    if sentence.endswith(("。", "！", "？")):
+        return True
+    if sentence.endswith(("..", "…")) or next_character.islower():
+        return False
+    last_word = re.search(r"(\w+)\.$", sentence)
+    if last_word:
+        word = last_word.group(1).casefold()
+        if word in SENTENCE_ABBREVIATIONS or (len(word) == 1 and word.isalpha()):
+            return False
+    return True
+
+def split_sentences(text):
+    """Divide el texto en frases por la puntuación final (. ! ? y sus variantes japonesas)."""
+    text = text.strip()
+    sentences = []
+    start = 0
+    for match in SENTENCE_SPLIT_PATTERN.finditer(text):
+        if match.end() >= len(text) or not is_sentence_boundary(text[start:match.start()], text[match.end()]):
+            continue
+        sentences.append(text[start:match.start()])
+        start = match.end()
+    sentences.append(text[start:])
+    return [sentence for sentence in sentences if sentence]
+
+def join_sentence_translations(translations):
+    """Une las traducciones de las frases; si alguna ha fallado, devuelve ese error."""
+    for translated_text in translations:
+        if is_translation_error(translated_text):
+            return translated_text
+    return " ".join(translated_text for translated_text in translations if translated_text)
+
+def translate_by_sentences(text, translator, on_partial=None):
+    """
+    Traduce el texto frase a frase. Cuando una línea solo gana frases nuevas,
+    las anteriores salen de la caché y solo se piden las nuevas (juntas, en una
+    petición agrupada). Si solo falta una, se traduce con streaming.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return translate_text(text, translator, on_partial=on_partial)
+
+    results, pending = lookup_cached_translations(sentences, translator)
+    if len(pending) == 1:
+        missing = pending[0]
+        sentence_partial = None
+        if on_partial:
+            def sentence_partial(partial_text):
+                on_partial(join_sentence_translations(results[:missing] + [partial_text]))
+        results[missing] = translate_uncached(sentences[missing], translator, on_partial=sentence_partial)
+    elif pending:
+        translate_pending_texts(sentences, pending, translator, results)
+    return join_sentence_translations(results)
+
+def translate_texts_by_sentences(texts, translator):
+    """Como translate_texts, pero cada texto se divide en frases antes de buscar en la caché."""
+    sentences_per_text = [split_sentences(text) if text else [] for text in texts]
+    all_sentences = [sentence for sentences in sentences_per_text for sentence in sentences]
+    all_translations = translate_texts(all_sentences, translator)
+
+    results = []
+    position = 0
+    for sentences in sentences_per_text:
+        results.append(join_sentence_translations(all_translations[position:position + len(sentences)]))
+        position += len(sentences)
+    return results
+
+# --- Caché de resultados del OCR ---
+def compute_image_hash(image, perceptual=OCR_CACHE_PERCEPTUAL):
+    """
+    Huella de los píxeles de la ROI. La exacta es un blake2b de los bytes; la
+    perceptual es un dHash (gradiente horizontal de una miniatura en grises).
+    """
+    if perceptual:
+        import cv2
+
+        gray = cv2.cvtColor(np.ascontiguousarray(image), cv2.COLOR_RGB2GRAY)
+        thumbnail = cv2.resize(gray, OCR_CACHE_HASH_SIZE, interpolation=cv2.INTER_AREA)
+        return b"p" + np.packbits(thumbnail[:, 1:] > thumbnail[:, :-1]).tobytes()
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.asarray(image.shape, dtype=np.int32).tobytes())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.digest()
+
+class OCRResultCache:
+    """
+    Caché de resultados del OCR (texto y cajas) indexada por la huella de los
+    píxeles de la ROI, el preajuste de preprocesado y los motores de OCR. Menús, la pantalla de
+    guardado o el nombre del personaje se repiten tal cual: un acierto evita
+    EasyOCR por completo. LRU en memoria con un límite de bytes aproximado y,
+    opcionalmente, una tabla SQLite en disco con un máximo de entradas.
+    """
+
+    EVICTION_CHECK_INTERVAL = 100  # Comprobar el tamaño en disco cada N inserciones
+
+    def __init__(self, max_bytes=OCR_CACHE_MAX_BYTES, path=None, disk_max_entries=OCR_CACHE_DISK_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.disk_max_entries = disk_max_entries
+        self.memory = OrderedDict()
+        self.memory_bytes = 0
+        self.lock = threading.Lock()
+        self.puts_since_eviction = 0
+        self.connection = None
+        if path:
+            try:
+                self.connection = sqlite3.connect(path, check_same_thread=False)
+                self.connection.execute(
+                    "CREATE TABLE IF NOT EXISTS ocr_results ("
+                    " key BLOB PRIMARY KEY, text TEXT NOT NULL, boxes TEXT NOT NULL, last_used REAL NOT NULL)"
+                )
+                self.connection.execute("CREATE INDEX IF NOT EXISTS ocr_results_last_used ON ocr_results (last_used)")
+                self.connection.commit()
+            except sqlite3.Error as e:
+                print(f"ADVERTENCIA: No se pudo abrir la caché del OCR en disco ({e}). Solo se usará la memoria.")
+                self.connection = None
+
+    @staticmethod
+    def make_key(image, preset, engine_mode=DEFAULT_OCR_ENGINE_MODE):
+        return f"{preset}\0{engine_mode}".encode("utf-8") + b"\0" + compute_image_hash(image)
+
+    @staticmethod
+    def entry_size(key, text, boxes):
+        # Aproximado: los bytes del texto y de la clave más unos 32 bytes por coordenada
+        return len(key) + len(text.encode("utf-8")) + 32 * sum(len(box) * 2 for box in boxes) + 100
+
+    def get(self, key):
+        """Devuelve (texto, cajas) o None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            if self.connection is None:
+                return None
+            try:
+                row = self.connection.execute("SELECT text, boxes FROM ocr_results WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                self.connection.execute("UPDATE ocr_results SET last_used = ? WHERE key = ?", (time.time(), key))
+                self.connection.commit()
+            except sqlite3.Error as e:
+                print(f"ERROR al leer la caché del OCR: {e}")
+                return None
+            result = (row[0], json.loads(row[1]))
+            self._remember(key, result)
+            return result
+
+    def put(self, key, text, boxes):
+        boxes = [[[float(x), float(y)] for x, y in box] for box in boxes]
+        with self.lock:
+            self._remember(key, (text, boxes))
+            if self.connection is None:
+                return
+            try:
+                self.connection.execute("INSERT OR REPLACE INTO ocr_results (key, text, boxes, last_used) VALUES (?, ?, ?, ?)",
+                                        (key, text, json.dumps(boxes), time.time()))
+                self.puts_since_eviction += 1
+                if self.puts_since_eviction >= self.EVICTION_CHECK_INTERVAL:
+                    self.puts_since_eviction = 0
+                    self._evict_disk()
+                self.connection.commit()
+            except sqlite3.Error as e:
+                print(f"ERROR al escribir en la caché del OCR: {e}")
+
+    def _remember(self, key, result):
+        if key in self.memory:
+            self.memory_bytes -= self.entry_size(key, *self.memory.pop(key))
+        self.memory[key] = result
+        self.memory_bytes += self.entry_size(key, *result)
+        while self.memory_bytes > self.max_bytes and len(self.memory) > 1:
+            old_key, old_result = self.memory.popitem(last=False)
+            self.memory_bytes -= self.entry_size(old_key, *old_result)
+
+    def _evict_disk(self):
+        """Elimina las entradas menos usadas recientemente si la tabla supera el máximo."""
+        count = self.connection.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+        excess = count - self.disk_max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM ocr_results WHERE rowid IN"
+                " (SELECT rowid FROM ocr_results ORDER BY last_used ASC LIMIT ?)", (excess,)
+            )
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+ocr_result_cache = None
+ocr_result_cache_lock = threading.Lock()
+
+def get_ocr_result_cache():
+    """Devuelve la caché de resultados del OCR, creándola la primera vez (ver get_translation_cache)."""
+    global ocr_result_cache
+    with ocr_result_cache_lock:
+        if ocr_result_cache is None:
+            ocr_result_cache = OCRResultCache(path=OCR_CACHE_PATH if OCR_CACHE_PERSIST else None)
+        return ocr_result_cache
+
+# --- OCR en procesos separados ---
+class OCRWorkerError(Exception):
+    """Un proceso de OCR ha fallado o ya no responde."""
+
+def set_process_affinity(cpu_ids):
+    """Fija el proceso actual a los núcleos indicados, si la plataforma lo permite."""
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            os.sched_setaffinity(0, cpu_ids)
+        elif sys.platform == "win32":
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetProcessAffinityMask(kernel32.GetCurrentProcess(), sum(1 << cpu for cpu in cpu_ids))
+    except OSError as e:
+        print(f"ADVERTENCIA: No se pudo fijar la afinidad del proceso de OCR ({e}).")
+
+def ocr_process_main(connection, torch_threads, cpu_ids):
+    """
+    Bucle de un proceso de OCR. Recibe por la tubería el nombre del bloque de
+    memoria compartida con el fotograma y solo devuelve el texto y las cajas:
+    las imágenes nunca se serializan.
+    """
+    if cpu_ids:
+        set_process_affinity(cpu_ids)
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    try:
+        warm_up_ocr()
+    except Exception as e:
+        connection.send(('error', str(e)))
+        return
+    connection.send(('ready', None))
+
+    frames = {}
+    incremental_states = {}
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+
+        frame_name, shape, preset, previous_boxes, roi_id, engine_mode = request
+        image = None
+        try:
+            if frame_name not in frames:
+                # El proceso principal ha sustituido el búfer por otro más grande
+                for frame in frames.values():
+                    frame.close()
+                frames = {frame_name: shared_memory.SharedMemory(name=frame_name)}
+            image = np.ndarray(shape, dtype=np.uint8, buffer=frames[frame_name].buf)
+            # Cada proceso guarda su propia detección por ROI; solo se compara con lo último que él vio
+            incremental_state = incremental_states.setdefault(roi_id, IncrementalOCRState()) if roi_id is not None else None
+            extracted_text, bounding_boxes = perform_ocr_with_preset(image, preset, previous_boxes, incremental_state, engine_mode)
+            bounding_boxes = [[[float(x), float(y)] for x, y in box] for box in bounding_boxes]
+            # Las métricas de este proceso viajan con el resultado para que el panel las muestre
+            connection.send(('ok', (extracted_text, bounding_boxes, performance_metrics.drain())))
+        except Exception as e:
+            connection.send(('error', str(e)))
+        finally:
+            # La vista debe liberarse antes de poder cerrar el bloque compartido
+            image = None
+
+    for frame in frames.values():
+        frame.close()
+
+class OCRProcessPool:
+    """
+    Grupo de procesos de OCR. Así EasyOCR y torch no compiten por el GIL con
+    el bucle de la interfaz, y con varias ROI el OCR se reparte entre núcleos.
+    Cada proceso tiene su propio bloque de memoria compartida donde el proceso
+    principal copia el fotograma antes de cada petición.
+    """
+
+    def __init__(self, processes=OCR_PROCESS_COUNT, torch_threads=OCR_PROCESS_TORCH_THREADS):
+        self.processes = processes
+        self.torch_threads = torch_threads
+        self.workers = []
+        self.workers_lock = threading.Lock()
+        self.idle_workers = queue.Queue()
+        self.ready = threading.Event()
+
+    def start(self):
+        """Arranca los procesos y espera a que carguen el modelo. Bloquea: llamar desde un hilo aparte."""
+        context = multiprocessing.get_context("spawn")
+        cpu_count = os.cpu_count() or 1
+        for number in range(self.processes):
+            cpu_ids = None
+            if OCR_PROCESS_PIN_CPUS:
+                cpu_ids = sorted({(number * self.torch_threads + i) % cpu_count for i in range(self.torch_threads)})
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=ocr_process_main, name=f"ocr-{number}", daemon=True,
+                                      args=(child_connection, self.torch_threads, cpu_ids))
+            process.start()
+            child_connection.close()
+            self.workers.append({'process': process, 'connection': parent_connection, 'frame': None})
+
+        for worker in self.workers:
+            if not worker['connection'].poll(OCR_PROCESS_START_TIMEOUT_S):
+                raise OCRWorkerError("el proceso de OCR no ha terminado de cargar el modelo a tiempo")
+            status, detail = worker['connection'].recv()
+            if status != 'ready':
+                raise OCRWorkerError(detail)
+            self.idle_workers.put(worker)
+        self.ready.set()
+
+    def ocr(self, image, preset, previous_boxes, roi_id=None, engine_mode=DEFAULT_OCR_ENGINE_MODE):
+        """
+        Ejecuta perform_ocr_with_preset en el primer proceso libre. Con roi_id,
+        el proceso usa el OCR incremental para esa ROI.
+        """
+        worker = self.acquire_worker()
+        try:
+            frame = worker['frame']
+            if frame is None or frame.size < image.nbytes:
+                if frame is not None:
+                    frame.close()
+                    frame.unlink()
+                frame = worker['frame'] = shared_memory.SharedMemory(create=True, size=max(image.nbytes, OCR_SHARED_FRAME_BYTES))
+            np.copyto(np.ndarray(image.shape, dtype=np.uint8, buffer=frame.buf), image)
+            worker['connection'].send((frame.name, image.shape, preset, previous_boxes, roi_id, engine_mode))
+            status, result = worker['connection'].recv()
+        except (EOFError, OSError) as e:
+            # El proceso ha muerto: se retira del grupo y los demás siguen atendiendo peticiones
+            self.discard_worker(worker)
+            raise OCRWorkerError(f"el proceso de OCR no responde ({e})")
+
+        self.idle_workers.put(worker)
+        if status != 'ok':
+            raise OCRWorkerError(result)
+        extracted_text, bounding_boxes, metrics = result
+        performance_metrics.merge(metrics)
+        return extracted_text, bounding_boxes
+
+    def acquire_worker(self):
+        """Espera a un proceso libre mientras quede alguno vivo en el grupo."""
+        while self.ready.is_set():
+            try:
+                return self.idle_workers.get(timeout=OCR_PROCESS_IDLE_POLL_S)
+            except queue.Empty:
+                continue
+        raise OCRWorkerError("no queda ningún proceso de OCR")
+
+    def discard_worker(self, worker):
+        """Retira un proceso que ha fallado. El grupo deja de estar listo cuando no queda ninguno."""
+        with self.workers_lock:
+            if worker not in self.workers:
+                return
+            self.workers.remove(worker)
+            if not self.workers:
+                self.ready.clear()
+        if worker['process'].is_alive():
+            worker['process'].terminate()
+        self.release_worker(worker)
+
+    @staticmethod
+    def release_worker(worker):
+        worker['connection'].close()
+        if worker['frame'] is not None:
+            worker['frame'].close()
+            worker['frame'].unlink()
+            worker['frame'] = None
+
+    def close(self):
+        self.ready.clear()
+        with self.workers_lock:
+            workers, self.workers = self.workers, []
+        for worker in workers:
+            try:
+                worker['connection'].send(None)
+            except OSError:
+                pass
+        for worker in workers:
+            worker['process'].join(timeout=2)
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+            self.release_worker(worker)
+
+# --- Comparación de preajustes de preprocesado ---
+def load_frames_from_directory(directory):
+    """
+    Carga las capturas (PNG/JPG) de una carpeta como arrays RGB. Si junto a una
+    imagen hay un .txt con el mismo nombre, se usa como texto de referencia.
+    """
+    from PIL import Image
+
+    frames = []
+    for name in sorted(os.listdir(directory)):
+        base, extension = os.path.splitext(name)
+        if extension.lower() not in CAPTURED_FRAME_EXTENSIONS:
+            continue
+        path = os.path.join(directory, name)
+        with Image.open(path) as image:
+            frame = np.asarray(image.convert("RGB"))
+        reference_path = os.path.join(directory, base + ".txt")
+        reference_text = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding="utf-8") as reference_file:
+                reference_text = reference_file.read().strip()
+        frames.append({'name': name, 'image': frame, 'reference': reference_text})
+    return frames
+
+def compare_ocr_presets(frames, presets=None, engine_modes=None):
+    """
+    Ejecuta el OCR de cada fotograma con cada preajuste y cada modo de motores
+    de OCR y mide la latencia y la coincidencia del texto con la referencia (el
+    .txt del fotograma o, si no hay, el resultado del preajuste "Original" solo
+    con EasyOCR).
+    """
+    presets = presets or list(OCR_PREPROCESS_PRESETS)
+    if engine_modes is None:
+        engine_modes = [mode for mode, engines in OCR_ENGINE_MODES.items()
+                        if all(OCR_ENGINES[engine]['available'] for engine in engines)]
+    references = []
+    for frame in frames:
+        reference_text, reference_boxes = perform_ocr(frame['image'], OCR_ENGINE_MODE_EASYOCR)
+        references.append((frame['reference'] if frame['reference'] is not None else reference_text, reference_boxes))
+
+    report = []
+    for engine_mode, preset in ((engine_mode, preset) for engine_mode in engine_modes for preset in presets):
+        latencies = []
+        exact_matches = 0
+        similarities = []
+        for frame, (reference_text, reference_boxes) in zip(frames, references):
+            start = time.perf_counter()
+            # Las cajas de referencia simulan las de la captura anterior de una ROI estable
+            extracted_text, _ = perform_ocr_with_preset(frame['image'], preset, reference_boxes, engine_mode=engine_mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+            expected = normalize_source_text(reference_text)
+            obtained = normalize_source_text(extracted_text)
+            exact_matches += expected == obtained
+            similarities.append(difflib.SequenceMatcher(None, expected, obtained).ratio())
+        report.append({
+            'preset': preset,
+            'engine_mode': engine_mode,
+            'frames': len(frames),
+            'latency_mean_ms': sum(latencies) / len(latencies) if latencies else 0.0,
+            'latency_p95_ms': percentile(latencies, 0.95),
+            'exact_match_rate': exact_matches / len(frames) if frames else 0.0,
+            'similarity_mean': sum(similarities) / len(similarities) if similarities else 0.0,
+        })
+    return report
+
+def print_ocr_preset_comparison(report):
+    print(f"{'Motores de OCR':<30}{'Preajuste':<18}{'Media (ms)':>12}{'p95 (ms)':>12}{'Coincidencia':>14}{'Similitud':>12}")
+    for row in report:
+        print(f"{row['engine_mode']:<30}{row['preset']:<18}{row['latency_mean_ms']:>12.1f}{row['latency_p95_ms']:>12.1f}"
+              f"{row['exact_match_rate']:>13.0%}{row['similarity_mean']:>12.3f}")
+
+# --- Modo por lotes (sin interfaz) ---
+def init_batch_ocr_process(torch_threads):
+    """Inicializa un proceso de OCR del modo por lotes: hilos de torch y modelo cargado."""
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    get_easyocr_reader()
+
+def batch_ocr_file(path, roi=None, preset=DEFAULT_OCR_PREPROCESS_PRESET, engine_mode=DEFAULT_OCR_ENGINE_MODE):
+    """OCR de una captura del lote. Se ejecuta en los procesos de OCR: solo viaja la ruta y el texto."""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        frame = np.asarray(image.convert("RGB"))
+    if roi is not None:
+        x1, y1, x2, y2 = roi
+        frame = frame[y1:y2, x1:x2]
+    return perform_ocr_with_preset(frame, preset, engine_mode=engine_mode)[0]
+
+def extract_batch_texts(path, roi=None, preset=DEFAULT_OCR_PREPROCESS_PRESET, processes=OCR_PROCESS_COUNT,
+                        engine_mode=DEFAULT_OCR_ENGINE_MODE):
+    """
+    Devuelve una lista de (origen, texto). Una carpeta se trata como capturas
+    de pantalla y se pasa por el OCR en varios procesos; un .txt (un volcado
+    del guion) aporta una línea por cada línea no vacía.
+    """
+    if os.path.isfile(path):
+        with open(path, encoding="utf-8") as script_file:
+            return [(f"{os.path.basename(path)}:{number}", line.strip())
+                    for number, line in enumerate(script_file, start=1) if line.strip()]
+
+    image_paths = [os.path.join(path, name) for name in sorted(os.listdir(path))
+                   if os.path.splitext(name)[1].lower() in CAPTURED_FRAME_EXTENSIONS]
+    if not image_paths:
+        return []
+
+    torch_threads = max(1, (os.cpu_count() or 1) // processes)
+    with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"),
+                             initializer=init_batch_ocr_process, initargs=(torch_threads,)) as executor:
+        texts = executor.map(batch_ocr_file, image_paths, [roi] * len(image_paths), [preset] * len(image_paths),
+                             [engine_mode] * len(image_paths))
+        results = []
+        for image_path, text in zip(image_paths, texts):
+            print(f"OCR {len(results) + 1}/{len(image_paths)}: {os.path.basename(image_path)}")
+            results.append((os.path.basename(image_path), text))
+    return results
+
+def run_batch_translation(path, translator, output_path=BATCH_OUTPUT_PATH, roi=None,
+                          preset=DEFAULT_OCR_PREPROCESS_PRESET, processes=OCR_PROCESS_COUNT,
+                          engine_mode=DEFAULT_OCR_ENGINE_MODE):
+    """
+    Traduce sin interfaz un lote de capturas o un guion con el mismo OCR y la
+    misma caché que la partida, de modo que las traducciones quedan guardadas
+    en la caché persistente y durante la partida casi todo sean aciertos.
+    """
+    if not TRANSLATION_BACKENDS.get(translator, {}).get('available'):
+        print(f"ERROR: El motor de traducción '{translator}' no está disponible.")
+        return None
+
+    # El lote rellena la caché con el motor elegido: no se compite con el de respaldo
+    translation_engine.hedging_enabled = False
+    start = time.perf_counter()
+    entries = extract_batch_texts(path, roi=roi, preset=preset, processes=processes, engine_mode=engine_mode)
+    unique_texts = list(dict.fromkeys(text for _, text in entries if text))
+    print(f"{len(entries)} textos leídos ({len(unique_texts)} distintos) en {time.perf_counter() - start:.1f} s.")
+
+    translations = {}
+    for chunk_start in range(0, len(unique_texts), BATCH_TRANSLATION_CHUNK):
+        chunk = unique_texts[chunk_start:chunk_start + BATCH_TRANSLATION_CHUNK]
+        translations.update(zip(chunk, translate_texts_by_sentences(chunk, translator)))
+        print(f"Traducidos {min(chunk_start + BATCH_TRANSLATION_CHUNK, len(unique_texts))}/{len(unique_texts)}")
+
+    results = [{'origen': source, 'texto': text, 'traduccion': translations.get(text, "")} for source, text in entries]
+    with open(output_path, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, ensure_ascii=False, indent=2)
+
+    errors = sum(1 for row in results if is_translation_error(row['traduccion']))
+    print(f"Resultados guardados en {output_path} ({errors} errores) en {time.perf_counter() - start:.1f} s.")
+    print(get_translation_cache().stats_summary())
+    return results
+
 # --- Funciones de la Interfaz de Usuario ---
 def create_overlay_window(position_and_size, on_close_callback, initial_text="", opacity=0.9, text_color="black", bg_color="white"):
     """
@@ -326,7 +2432,7 @@ def create_overlay_window(position_and_size, on_close_callback, initial_text="",
     canvas = tk.Canvas(frame_content, bg=bg_color, highlightthickness=0)
     canvas.pack(fill=tk.BOTH, expand=True)
 
-    custom_font = font.Font(family="Helvetica", size=10, weight="bold")
+    custom_font = get_overlay_font(10)
 
     text_id = canvas.create_text(
         (width) / 2, (height) / 2,
@@ -339,15 +2445,560 @@ def create_overlay_window(position_and_size, on_close_callback, initial_text="",
 
     return root, canvas, text_id, width, height, frame_header, frame_content
 
+def get_overlay_font(font_size):
+    """Devuelve la fuente de los recuadros para ese tamaño, creándola solo la primera vez."""
+    custom_font = overlay_fonts.get(font_size)
+    if custom_font is None:
+        custom_font = overlay_fonts[font_size] = font.Font(family="Helvetica", size=font_size, weight="bold")
+    return custom_font
+
 def update_overlay_window(canvas, text_id, new_text, container_width, container_height, font_size, text_color):
     """
     Actualiza el texto en el canvas de la ventana de superposición usando el
     tamaño de fuente calculado y el color de texto.
     """
-    custom_font = font.Font(family="Helvetica", size=font_size, weight="bold")
+    custom_font = get_overlay_font(font_size)
     canvas.itemconfig(text_id, text=new_text, font=custom_font, width=container_width - 20, fill=text_color)
     canvas.coords(text_id, container_width / 2, container_height / 2)
 
+# --- Pipeline de captura, OCR y traducción ---
+def post_ui_message(message):
+    """
+    Encola un mensaje para el hilo de la interfaz. No se toca Tk desde el hilo
+    que llama: la interfaz recoge los mensajes en su siguiente vaciado de la cola.
+    """
+    translation_queue.put(message)
+
+def post_overlay_update(roi_id, text, font_size, text_color, partial=False, started_at=None):
+    """
+    Encola el texto de un recuadro para que lo dibuje el hilo de la interfaz.
+    Las marcas de tiempo permiten medir la espera en la cola y la latencia total.
+    """
+    post_ui_message({'kind': 'overlay', 'id': roi_id, 'text': text, 'font_size': font_size, 'text_color': text_color,
+                     'partial': partial, 'queued_at': time.perf_counter(), 'started_at': started_at})
+
+class RoiScheduler:
+    """
+    Turnos por ROI en los que siempre gana lo más reciente. Cada pulsación de la
+    tecla o ciclo del modo continuo pide una captura; si llega otra petición
+    antes de capturar, la anterior se descarta. Cada fotograma capturado y cada
+    línea enviada a traducir reciben un número de generación: el OCR de un
+    fotograma superado y la traducción de una línea superada se abandonan, y su
+    resultado nunca llega a la cola de la interfaz.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}          # ROI -> última petición de captura
+        self.captured_requests = {} # ROI -> última petición ya capturada
+        self.frames = {}            # ROI -> generación del último fotograma capturado
+        self.lines = {}             # ROI -> generación de la última línea enviada a traducir (o borrada)
+
+    def request_capture(self, roi_id):
+        with self.lock:
+            self.requests[roi_id] = self.requests.get(roi_id, 0) + 1
+            return self.requests[roi_id]
+
+    def has_pending_capture(self, roi_id):
+        with self.lock:
+            return self.requests.get(roi_id, 0) > self.captured_requests.get(roi_id, 0)
+
+    def start_capture(self, roi_id, request):
+        """False si ya hay una petición más reciente para la ROI: será esa la que capture."""
+        with self.lock:
+            if request != self.requests.get(roi_id):
+                return False
+            self.captured_requests[roi_id] = request
+            return True
+
+    def new_frame(self, roi_id):
+        with self.lock:
+            self.frames[roi_id] = self.frames.get(roi_id, 0) + 1
+            return self.frames[roi_id]
+
+    def is_current_frame(self, roi_id, frame):
+        with self.lock:
+            return self.frames.get(roi_id) == frame
+
+    def commit_text(self, roi_id, frame, text):
+        """
+        Registra el texto reconocido en un fotograma. Devuelve None si el
+        fotograma ya está superado, 0 si la ROI sigue mostrando la misma línea
+        y, si la línea ha cambiado (o la ROI se ha quedado vacía), su nueva
+        generación. Comparar y actualizar a la vez evita que dos hilos de OCR
+        den por nueva la misma línea.
+        """
+        with self.lock:
+            if self.frames.get(roi_id) != frame:
+                return None
+            previous_text = last_extracted_text_per_roi.get(roi_id, "")
+            if (text and is_same_line(text, previous_text)) or (not text and not previous_text):
+                return 0
+            last_extracted_text_per_roi[roi_id] = text
+            self.lines[roi_id] = self.lines.get(roi_id, 0) + 1
+            return self.lines[roi_id]
+
+    def is_current_line(self, roi_id, line):
+        with self.lock:
+            return self.lines.get(roi_id) == line
+
+    def forget(self, roi_id):
+        with self.lock:
+            for generations in (self.requests, self.captured_requests, self.frames, self.lines):
+                generations.pop(roi_id, None)
+
+class TranslationPass:
+    """
+    Agrupa las ROI de una pulsación de la tecla (o de un ciclo del modo continuo)
+    y llama a on_done cuando todas han pasado por el pipeline.
+    """
+
+    def __init__(self, windows, translator, only_if_frame_changed=False, activate_window=True, batch=False, on_done=None):
+        self.windows = windows
+        self.requests = {} # ROI -> petición de captura en RoiScheduler
+        self.translator = translator
+        self.only_if_frame_changed = only_if_frame_changed
+        self.activate_window = activate_window
+        self.batch = batch
+        self.on_done = on_done
+        self.pending = len(windows)
+        self.ocr_pending = 0
+        self.batch_items = []
+        self.translated_any = False
+        self.started_at = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def ocr_item_done(self, item_to_translate):
+        """
+        Registra el final del OCR de una ROI. En modo agrupado acumula los textos
+        y devuelve la lista completa cuando termina el OCR de la última ROI de la
+        pasada; si no, devuelve una lista con el propio elemento (o vacía).
+        """
+        with self.lock:
+            self.ocr_pending -= 1
+            if not self.batch:
+                return [item_to_translate] if item_to_translate else []
+            if item_to_translate:
+                self.batch_items.append(item_to_translate)
+            if self.ocr_pending > 0:
+                return []
+            items, self.batch_items = self.batch_items, []
+            return items
+
+    def item_done(self):
+        with self.lock:
+            self.pending -= 1
+            finished = self.pending == 0
+        if finished:
+            self.finish()
+
+    def finish(self):
+        if self.on_done:
+            self.on_done(self)
+
+class TranslationPipeline:
+    """
+    Pipeline por etapas: captura -> OCR -> grupo de hilos de traducción, unidas
+    por colas acotadas. Así una ROI se reconoce mientras otra se traduce y cada
+    recuadro se actualiza en cuanto su propio resultado está listo.
+    """
+
+    def __init__(self, app, translation_workers=TRANSLATION_WORKERS, queue_size=PIPELINE_QUEUE_SIZE,
+                 ocr_threads=OCR_PROCESS_COUNT):
+        self.app = app
+        self.pass_queue = queue.Queue(maxsize=queue_size)
+        self.ocr_queue = queue.Queue(maxsize=queue_size)
+        self.translate_queue = queue.Queue(maxsize=queue_size)
+        self.ocr_pool = None # OCRProcessPool cuando el OCR se ejecuta en procesos separados
+        self.in_process_ocr_lock = threading.Lock()
+        self.incremental_ocr_states = {} # ROI -> IncrementalOCRState del OCR de este proceso
+        self.scheduler = RoiScheduler()
+        # Todas las capturas (pasadas, recapturas del texto en curso y fotogramas
+        # guardados) se hacen en el hilo de captura: ocultar -> capturar -> restaurar
+        # nunca se solapa y el motor de captura solo abre una conexión
+        self.capture_tasks = queue.Queue()
+        self.typewriter_samples = deque() # (instante, elemento); el intervalo es fijo, así que ya van en orden
+        self.typewriter_lock = threading.Lock()
+
+        threading.Thread(target=self.capture_stage, name="captura", daemon=True).start()
+        # Un hilo por proceso de OCR para poder mantenerlos todos ocupados
+        for ocr_number in range(ocr_threads):
+            threading.Thread(target=self.ocr_stage, name=f"ocr-{ocr_number}", daemon=True).start()
+        for worker_number in range(translation_workers):
+            threading.Thread(target=self.translation_worker, name=f"traduccion-{worker_number}", daemon=True).start()
+
+    def submit(self, translation_pass):
+        if not translation_pass.windows:
+            translation_pass.finish()
+            return
+        for window_data in translation_pass.windows:
+            translation_pass.requests[window_data['id']] = self.scheduler.request_capture(window_data['id'])
+        self.pass_queue.put(translation_pass)
+
+    def capture_stage(self):
+        while True:
+            try:
+                translation_pass = self.pass_queue.get(timeout=self.next_typewriter_delay())
+            except queue.Empty:
+                translation_pass = None
+            # None solo despierta al hilo para atender las tareas y las recapturas pendientes
+            if translation_pass is not None:
+                # Se encola después de restaurar los recuadros: si la cola está llena no deben quedarse ocultos
+                self.enqueue_for_ocr(self.capture_pass(translation_pass))
+            self.run_capture_tasks()
+            for item in self.pop_due_typewriter_samples():
+                self.sample_typewriter(item)
+
+    def wake_capture_stage(self):
+        try:
+            self.pass_queue.put_nowait(None)
+        except queue.Full:
+            pass # El hilo de captura tiene trabajo en cola y revisará lo pendiente al terminarlo
+
+    def run_on_capture_thread(self, func):
+        """Ejecuta func en el hilo de captura, entre dos pasadas."""
+        self.capture_tasks.put(func)
+        self.wake_capture_stage()
+
+    def run_capture_tasks(self):
+        while True:
+            try:
+                func = self.capture_tasks.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                func()
+            except Exception as e:
+                self.app.log_message(f"Error en el hilo de captura: {e}", "error")
+
+    def capture_pass(self, translation_pass):
+        """Captura las ROI de la pasada y devuelve las que deben pasar por el OCR."""
+        global last_frame_signature_per_roi
+
+        captured = []
+
+        # Las ROI con una petición más reciente en cola se capturarán en esa pasada
+        windows = []
+        for window_data in translation_pass.windows:
+            if self.scheduler.start_capture(window_data['id'], translation_pass.requests[window_data['id']]):
+                windows.append(window_data)
+            else:
+                performance_metrics.increment('coalesced_requests')
+                translation_pass.item_done()
+        if not windows:
+            return captured
+
+        if selected_window and translation_pass.activate_window:
+            try:
+                selected_window.activate()
+            except Exception as e:
+                self.app.log_message(f"Error al activar la ventana: {e}", "error")
+
+        images, capture_time = self.capture_windows(windows)
+        for window_data, preprocessed_image in zip(windows, images):
+            roi_id = window_data['id']
+            try:
+                performance_metrics.record('capture', capture_time, roi_id=roi_id)
+                if preprocessed_image is None:
+                    translation_pass.item_done()
+                    continue
+
+                # Se compara con el último fotograma que pasó por el OCR, no con la captura
+                # anterior: así los cambios graduales (texto letra a letra) se van sumando
+                signature = compute_frame_signature(preprocessed_image)
+                if (translation_pass.only_if_frame_changed
+                        and not frame_has_changed(last_frame_signature_per_roi.get(roi_id), signature)):
+                    performance_metrics.increment('ocr_skipped')
+                    translation_pass.item_done()
+                    continue
+                last_frame_signature_per_roi[roi_id] = signature
+
+                captured.append({'pass': translation_pass, 'window': window_data, 'image': preprocessed_image,
+                                 'signature': signature, 'frame': self.scheduler.new_frame(roi_id)})
+            except Exception as e:
+                self.app.log_message(f"Error al capturar la ROI {roi_id}: {e}", "error")
+                translation_pass.item_done()
+
+        with translation_pass.lock:
+            translation_pass.ocr_pending = len(captured)
+        return captured
+
+    def capture_windows(self, windows):
+        """
+        Captura las ROI de los recuadros con la estrategia elegida en la interfaz.
+        Devuelve las imágenes (None para las que fallan) y la duración de la captura.
+        """
+        coords_list = [window_data['roi_coords'] for window_data in windows]
+        strategy = self.app.capture_strategy
+
+        if strategy == CAPTURE_STRATEGY_WINDOW:
+            capture_start = time.perf_counter()
+            try:
+                images = capture_window_rois(selected_window, coords_list)
+                if images is not None:
+                    return images, time.perf_counter() - capture_start
+            except Exception as e:
+                self.app.log_message(f"Error al capturar la ventana del juego: {e}", "error")
+
+        # Ocultar temporalmente los recuadros para que no interfieran con la captura de pantalla
+        hide_start = time.perf_counter()
+        hidden_roots = self.app.hide_overlays(None if strategy == CAPTURE_STRATEGY_HIDE_ALL else coords_list)
+        performance_metrics.record('hide_overlays', time.perf_counter() - hide_start)
+        try:
+            capture_start = time.perf_counter()
+            images = capture_rois(coords_list)
+            return images, time.perf_counter() - capture_start
+        finally:
+            self.app.restore_overlays(hidden_roots)
+
+    def start_typewriter_wait(self, item, extracted_text, bounding_boxes):
+        """
+        Si el juego muestra el texto letra a letra, la ROI se vuelve a capturar cada
+        TYPEWRITER_SAMPLE_INTERVAL_S hasta que el texto deja de cambiar, para no
+        traducir media línea. La espera no ocupa el hilo del OCR: el hilo de captura
+        hace la recaptura cuando toca y devuelve el elemento a la cola del OCR.
+        """
+        item['typewriter'] = {'text': extracted_text, 'boxes': bounding_boxes,
+                              'deadline': time.monotonic() + TYPEWRITER_MAX_WAIT_S}
+        self.schedule_typewriter_sample(item)
+
+    def schedule_typewriter_sample(self, item):
+        with self.typewriter_lock:
+            self.typewriter_samples.append((time.monotonic() + TYPEWRITER_SAMPLE_INTERVAL_S, item))
+        self.wake_capture_stage()
+
+    def next_typewriter_delay(self):
+        """Segundos hasta la próxima recaptura pendiente, o None si no hay ninguna."""
+        with self.typewriter_lock:
+            if not self.typewriter_samples:
+                return None
+            return max(0.0, self.typewriter_samples[0][0] - time.monotonic())
+
+    def pop_due_typewriter_samples(self):
+        now = time.monotonic()
+        due = []
+        with self.typewriter_lock:
+            while self.typewriter_samples and self.typewriter_samples[0][0] <= now:
+                due.append(self.typewriter_samples.popleft()[1])
+        return due
+
+    def sample_typewriter(self, item):
+        """
+        Vuelve a capturar la ROI de un elemento que espera al texto (en el hilo de
+        captura). La muestra se compara con el último fotograma de la espera que
+        pasó por el OCR, no con la muestra anterior, para que los cambios de
+        una letra cada vez se vayan sumando; el OCR solo se repite si ha cambiado.
+        La espera termina cuando deja de cambiar, al vencer el plazo o cuando otra
+        pasada ya ha capturado un fotograma más reciente de la ROI.
+        """
+        global last_frame_signature_per_roi
+
+        roi_id = item['window']['id']
+        item['settled'] = True
+        try:
+            if (time.monotonic() < item['typewriter']['deadline']
+                    and self.scheduler.is_current_frame(roi_id, item['frame'])):
+                image = self.capture_windows([item['window']])[0][0]
+                if image is not None:
+                    signature = compute_frame_signature(image)
+                    if frame_has_changed(item.get('signature'), signature):
+                        item['signature'] = last_frame_signature_per_roi[roi_id] = signature
+                        performance_metrics.increment('typewriter_resamples')
+                        item['image'] = image
+                        item['settled'] = False
+        except Exception as e:
+            self.app.log_message(f"Error al volver a capturar la ROI {roi_id}: {e}", "error")
+        self.ocr_queue.put(item)
+
+    def enqueue_for_ocr(self, items):
+        for item in items:
+            self.ocr_queue.put(item)
+
+    def ocr_stage(self):
+        while True:
+            item = self.ocr_queue.get()
+            translation_pass = item['pass']
+            roi_id = item['window']['id']
+            item_to_translate = None
+            try:
+                # Se saca la imagen del elemento para liberar cuanto antes el búfer de captura
+                image = item.pop('image', None)
+                typewriter = item.get('typewriter')
+                if not self.scheduler.is_current_frame(roi_id, item['frame']):
+                    # Ya se ha capturado un fotograma más reciente de esta ROI
+                    performance_metrics.increment('stale_ocr')
+                    image = None
+                else:
+                    if item.get('settled'):
+                        # La ROI ha dejado de cambiar mientras se esperaba al texto
+                        extracted_text, bounding_boxes = typewriter['text'], typewriter['boxes']
+                    else:
+                        ocr_start = time.perf_counter()
+                        extracted_text, bounding_boxes = self.run_ocr(
+                            image, item['window'].get('ocr_preset', DEFAULT_OCR_PREPROCESS_PRESET),
+                            last_bounding_boxes_per_roi.get(roi_id), roi_id)
+                        image = None
+                        performance_metrics.record('ocr', time.perf_counter() - ocr_start, roi_id=roi_id)
+                        self.store_reference_boxes(item['window'], roi_id, bounding_boxes)
+
+                        if typewriter is not None:
+                            if not extracted_text or (is_same_line(extracted_text, typewriter['text'])
+                                                      and not is_text_growing(extracted_text, typewriter['text'])):
+                                extracted_text, bounding_boxes = typewriter['text'], typewriter['boxes']
+                            else:
+                                # El texto sigue apareciendo: se vuelve a muestrear más tarde
+                                typewriter['text'], typewriter['boxes'] = extracted_text, bounding_boxes
+                                self.schedule_typewriter_sample(item)
+                                continue
+                        elif (extracted_text and self.app.stabilize_text
+                                and not is_same_line(extracted_text, last_extracted_text_per_roi.get(roi_id, ""))):
+                            self.start_typewriter_wait(item, extracted_text, bounding_boxes)
+                            continue
+
+                    line = self.scheduler.commit_text(roi_id, item['frame'], extracted_text)
+                    if line is None:
+                        performance_metrics.increment('stale_ocr')
+                    elif line and extracted_text:
+                        self.app.log_message(f"Texto detectado en ROI {roi_id}: {extracted_text}", "detected")
+                        item['text'] = extracted_text
+                        item['bounding_boxes'] = bounding_boxes
+                        item['line'] = line
+                        # El hilo de traducción marcará el elemento como terminado
+                        item_to_translate = item
+                    elif line:
+                        post_overlay_update(roi_id, "", 10, self.app.text_color, started_at=translation_pass.started_at)
+                        self.app.log_message(f"No se detectó texto en ROI {roi_id}.", "info")
+            except Exception as e:
+                self.app.log_message(f"Error en el OCR de la ROI {roi_id}: {e}", "error")
+
+            items = translation_pass.ocr_item_done(item_to_translate)
+            if items:
+                self.translate_queue.put(items)
+            if item_to_translate is None:
+                translation_pass.item_done()
+
+    def store_reference_boxes(self, window_data, roi_id, bounding_boxes):
+        """Guarda las cajas que usará el preprocesado de la siguiente captura de la ROI."""
+        boxes = next_reference_boxes(window_data.get('ocr_preset', DEFAULT_OCR_PREPROCESS_PRESET),
+                                     last_bounding_boxes_per_roi.get(roi_id), bounding_boxes)
+        if boxes:
+            last_bounding_boxes_per_roi[roi_id] = boxes
+
+    def run_ocr(self, image, preset, previous_boxes, roi_id=None):
+        """
+        Consulta primero la caché de resultados del OCR; si no está, usa los
+        procesos de OCR si están listos y, si no o si fallan, el lector de este proceso.
+        Con roi_id y el OCR incremental activado se reutiliza la detección de la ROI.
+        """
+        if not self.app.incremental_ocr:
+            roi_id = None
+        engine_mode = self.app.ocr_engine_mode
+        cache_key = OCRResultCache.make_key(image, preset, engine_mode)
+        cached = get_ocr_result_cache().get(cache_key)
+        if cached is not None:
+            performance_metrics.increment('ocr_cache_hits')
+            return cached
+
+        performance_metrics.increment('ocr_calls')
+        result = None
+        ocr_pool = self.ocr_pool
+        if ocr_pool is not None and ocr_pool.ready.is_set():
+            try:
+                result = ocr_pool.ocr(image, preset, previous_boxes, roi_id, engine_mode)
+            except OCRWorkerError as e:
+                self.app.log_message(f"Error en el proceso de OCR: {e}. Se usará el OCR local.", "error")
+        if result is None:
+            with self.in_process_ocr_lock:
+                incremental_state = None
+                if roi_id is not None:
+                    incremental_state = self.incremental_ocr_states.setdefault(roi_id, IncrementalOCRState())
+                result = perform_ocr_with_preset(image, preset, previous_boxes, incremental_state, engine_mode)
+
+        get_ocr_result_cache().put(cache_key, *result)
+        return result
+
+    def translation_worker(self):
+        while True:
+            items = self.translate_queue.get()
+            # Las líneas que ya ha sustituido otra más reciente no se traducen
+            current_items = []
+            for item in items:
+                if self.is_current_item(item):
+                    current_items.append(item)
+                else:
+                    performance_metrics.increment('stale_translations')
+                    item['pass'].item_done()
+            if len(current_items) == 1:
+                self.translate_item(current_items[0])
+            elif current_items:
+                self.translate_items_batched(current_items)
+
+    def is_current_item(self, item):
+        return self.scheduler.is_current_line(item['window']['id'], item['line'])
+
+    def post_translation(self, item, translated_text, font_size):
+        """Envía la traducción a su recuadro salvo que la ROI ya muestre una línea más reciente."""
+        roi_id = item['window']['id']
+        if not self.is_current_item(item):
+            # Queda en la caché, pero no debe tapar la línea actual
+            performance_metrics.increment('stale_translations')
+            return False
+        post_overlay_update(roi_id, translated_text, font_size, self.app.text_color, started_at=item['pass'].started_at)
+        self.app.log_message(f"Traducción para ROI {roi_id}: {translated_text}", "translated")
+        return True
+
+    def translate_item(self, item):
+        translation_pass = item['pass']
+        roi_id = item['window']['id']
+        try:
+            font_size = calculate_font_size_from_bbox(item['bounding_boxes'])
+
+            on_partial = None
+            if self.app.stream_translations:
+                def on_partial(partial_text):
+                    if self.is_current_item(item):
+                        post_overlay_update(roi_id, partial_text + " …", font_size, self.app.text_color, partial=True)
+
+            translate_start = time.perf_counter()
+            if self.app.split_sentences:
+                translated_text = translate_by_sentences(item['text'], translation_pass.translator, on_partial=on_partial)
+            else:
+                translated_text = translate_text(item['text'], translation_pass.translator, on_partial=on_partial)
+            performance_metrics.record('translate', time.perf_counter() - translate_start, roi_id=roi_id, backend=translation_pass.translator)
+
+            if self.post_translation(item, translated_text, font_size):
+                translation_pass.translated_any = True
+        except Exception as e:
+            self.app.log_message(f"Error en el hilo de traducción: {e}", "error")
+            post_overlay_update(roi_id, "[ERROR en el hilo de traducción]", 10, self.app.text_color)
+        finally:
+            translation_pass.item_done()
+
+    def translate_items_batched(self, items):
+        """Traduce con una sola petición todos los textos que han cambiado en la pasada."""
+        translation_pass = items[0]['pass']
+        try:
+            translate_start = time.perf_counter()
+            texts = [item['text'] for item in items]
+            if self.app.split_sentences:
+                translated_texts = translate_texts_by_sentences(texts, translation_pass.translator)
+            else:
+                translated_texts = translate_texts(texts, translation_pass.translator)
+            translate_time = time.perf_counter() - translate_start
+            for item, translated_text in zip(items, translated_texts):
+                roi_id = item['window']['id']
+                performance_metrics.record('translate', translate_time, roi_id=roi_id, backend=translation_pass.translator)
+                font_size = calculate_font_size_from_bbox(item['bounding_boxes'])
+                if self.post_translation(item, translated_text, font_size):
+                    translation_pass.translated_any = True
+        except Exception as e:
+            self.app.log_message(f"Error en el hilo de traducción: {e}", "error")
+            for item in items:
+                post_overlay_update(item['window']['id'], "[ERROR en el hilo de traducción]", 10, self.app.text_color)
+        finally:
+            for item in items:
+                translation_pass.item_done()
+
 class StyleOptionsWindow(ctk.CTkToplevel):
     def __init__(self, master, app_instance):
         super().__init__(master)
@@ -393,26 +3044,137 @@ class App(ctk.CTk):
     def __init__(self):
         super().__init__()
         self.title("Control del Traductor")
-        # Nuevo tamaño para la interfaz más ancha
-        self.geometry("800x650") 
-        self.after_id = None
+        # Nuevo tamaño para la interfaz más ancha; las opciones avanzadas se desplazan dentro de su panel
+        self.geometry("800x760")
+        self.minsize(700, 600)
         self.hotkey = None
         self.is_running = False
         self.selected_window_title = None
         self.opacity = 0.9 # Nuevo: Opacidad por defecto
         self.text_color = "black" # Nuevo: Color de texto por defecto
         self.bg_color = "white" # Nuevo: Color de fondo por defecto
+        self.stream_translations = True # Mostrar la traducción de Ollama mientras se genera
+        self.batch_translations = True # Traducir en una sola petición los textos que cambian en la misma pasada
+        self.ocr_preset = DEFAULT_OCR_PREPROCESS_PRESET # Preprocesado del OCR para las ROI nuevas
+        self.stabilize_text = True # Esperar a que el texto termine de aparecer antes de traducirlo
+        self.split_sentences = True # Traducir frase a frase para reutilizar las ya traducidas
+        self.incremental_ocr = True # Reutilizar las cajas detectadas y reconocer solo las que cambian
+        self.ocr_engine_mode = DEFAULT_OCR_ENGINE_MODE # Motores de OCR que se prueban por orden
+        self.next_roi_id = 0
+        self.pending_log_lines = deque(maxlen=LOG_MAX_LINES) # Mensajes aún no insertados en el recuadro
+        self.log_flush_id = None
+        self.log_listener = start_session_log()
+        self.capture_strategy = DEFAULT_CAPTURE_STRATEGY # Cómo evitar que los recuadros salgan en la captura
+        self.ui_thread = threading.current_thread()
 
         ctk.set_appearance_mode("Dark")
         ctk.set_default_color_theme("blue")
         
         self.create_widgets()
+        self.ui_poll_ms = UI_POLL_BUSY_MS
+        self.ui_poll_id = self.after(self.ui_poll_ms, self.process_ui_queue)
+        self.pipeline = TranslationPipeline(self)
+        self.ocr_ready = threading.Event()
         self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(0, self.on_window_ready)
+        self.last_metrics_export = time.monotonic()
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
+    def refresh_metrics(self):
+        """Actualiza el panel de rendimiento y exporta las métricas cada METRICS_EXPORT_INTERVAL_S."""
+        self.metrics_box.configure(state=tk.NORMAL)
+        self.metrics_box.delete("1.0", tk.END)
+        self.metrics_box.insert(tk.END, performance_metrics.summary_text())
+        self.metrics_box.configure(state=tk.DISABLED)
+
+        if METRICS_EXPORT_INTERVAL_S and time.monotonic() - self.last_metrics_export >= METRICS_EXPORT_INTERVAL_S:
+            self.last_metrics_export = time.monotonic()
+            try:
+                performance_metrics.export(METRICS_EXPORT_PATH)
+            except OSError as e:
+                self.log_message(f"Error al exportar las métricas: {e}", "error")
+
+        self.after(METRICS_REFRESH_MS, self.refresh_metrics)
+
+    def on_window_ready(self):
+        """Se ejecuta con el bucle de eventos ya en marcha: la ventana es utilizable."""
+        self.log_message(f"Ventana lista en {time.perf_counter() - PROGRAM_START:.2f} s. Cargando el modelo de OCR en segundo plano...", "info")
+        threading.Thread(target=self.load_ocr_in_background, name="carga-ocr", daemon=True).start()
+        get_translation_cache() # Abre la caché y empieza a cargar la memoria aproximada
+        if OLLAMA_ENABLED:
+            threading.Thread(target=self.preload_ollama_in_background, name="carga-ollama", daemon=True).start()
+
+    def preload_ollama_in_background(self):
+        """Si el servidor de Ollama ya está en marcha, deja el modelo cargado en memoria."""
+        if not is_ollama_ready():
+            self.log_message("Ollama no responde todavía; se iniciará al traducir con él.", "info")
+            return
+        start = time.perf_counter()
+        if preload_ollama_model():
+            self.log_message(f"Modelo '{OLLAMA_MODEL}' de Ollama precargado en {time.perf_counter() - start:.2f} s.", "success")
+
+    def load_ocr_in_background(self):
+        try:
+            load_start = time.perf_counter()
+            get_easyocr_reader()
+            warm_up_start = time.perf_counter()
+            warm_up_ocr()
+            now = time.perf_counter()
+            self.ocr_ready.set()
+            self.log_message(f"OCR listo en {now - PROGRAM_START:.2f} s (carga {warm_up_start - load_start:.2f} s, "
+                             f"calentamiento {now - warm_up_start:.2f} s).", "success")
+        except Exception as e:
+            self.log_message(f"Error al cargar el modelo de OCR: {e}", "error")
+
+    def is_ui_thread(self):
+        return threading.current_thread() is self.ui_thread
+
+    def run_in_ui(self, func, wait=True, timeout=UI_CALL_TIMEOUT_S):
+        """
+        Ejecuta func en el hilo de la interfaz. Desde otro hilo, si wait es True,
+        espera a que termine y devuelve su resultado (None si vence el plazo).
+        """
+        if self.is_ui_thread():
+            return func()
+        message = {'kind': 'call', 'func': func, 'done': threading.Event(), 'result': None}
+        post_ui_message(message)
+        if wait and message['done'].wait(timeout):
+            return message['result']
+        return None
+
+    def warn(self, title, message):
+        """Muestra un cuadro de advertencia desde cualquier hilo, sin esperar a que se cierre."""
+        self.run_in_ui(lambda: show_warning(title, message), wait=False)
 
     def log_message(self, message, message_type="info"):
-        """Inserta un mensaje en el recuadro de seguimiento con un color específico."""
+        """
+        Añade un mensaje al recuadro de seguimiento con un color específico y al
+        archivo de registro. Se puede llamar desde cualquier hilo.
+        """
+        session_logger.log(logging.ERROR if message_type == "error" else logging.INFO, "[%s] %s", message_type, message)
+        line = f"{time.strftime('[%H:%M:%S]')} {message}\n"
+        if not self.is_ui_thread():
+            post_ui_message({'kind': 'log', 'line': line, 'message_type': message_type})
+            return
+        self.queue_log_line(line, message_type)
+
+    def queue_log_line(self, line, message_type):
+        self.pending_log_lines.append((line, message_type))
+        if self.log_flush_id is None:
+            self.log_flush_id = self.after(LOG_FLUSH_MS, self.flush_log)
+
+    def flush_log(self):
+        """Inserta de una vez los mensajes pendientes y recorta el recuadro a LOG_MAX_LINES líneas."""
+        self.log_flush_id = None
+        if not self.pending_log_lines:
+            return
         self.log_box.configure(state=tk.NORMAL)
-        self.log_box.insert(tk.END, f"{time.strftime('[%H:%M:%S]')} {message}\n", (message_type,))
+        while self.pending_log_lines:
+            line, message_type = self.pending_log_lines.popleft()
+            self.log_box.insert(tk.END, line, (message_type,))
+        line_count = int(self.log_box.index("end-1c").split(".")[0]) - 1
+        if line_count > LOG_MAX_LINES:
+            self.log_box.delete("1.0", f"{line_count - LOG_MAX_LINES + 1}.0")
         self.log_box.see(tk.END)
         self.log_box.configure(state=tk.DISABLED)
 
@@ -442,7 +3204,32 @@ class App(ctk.CTk):
     def create_widgets(self):
         main_frame = ctk.CTkFrame(self, corner_radius=10)
         main_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
+
+        # --- Controles inferiores ---
+        # Se empaquetan antes que los paneles y abajo del todo: si la ventana es pequeña,
+        # el que se encoge es el contenido y no la tecla de acceso rápido ni el modo continuo
+        bottom_controls_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        bottom_controls_frame.pack(side=tk.BOTTOM, fill=tk.X, padx=5, pady=5)
+
+        # Botón para seleccionar el área de OCR
+        ctk.CTkButton(bottom_controls_frame, text="Seleccionar Área de OCR", command=self.on_select_roi_button).pack(fill=tk.X, padx=5, pady=2)
+
+        # Botón para abrir la ventana de opciones de estilo (NUEVO)
+        ctk.CTkButton(bottom_controls_frame, text="Opciones de Estilo", command=self.open_style_options).pack(fill=tk.X, padx=5, pady=2)
+
+        # Sección de Tecla de Acceso Rápido
+        hotkey_frame = ctk.CTkFrame(bottom_controls_frame, corner_radius=8)
+        hotkey_frame.pack(fill=tk.X, padx=5, pady=5)
+        ctk.CTkLabel(hotkey_frame, text="Tecla de acceso rápido:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.hotkey_entry = ctk.CTkEntry(hotkey_frame, placeholder_text="Ej: f1, ctrl+q, alt+s")
+        self.hotkey_entry.pack(fill=tk.X, padx=10, pady=2)
+        ctk.CTkButton(hotkey_frame, text="Establecer Tecla", command=self.set_hotkey).pack(fill=tk.X, padx=10, pady=10)
+
+        # Modo continuo: captura cada ROI periódicamente y solo lanza el OCR si el fotograma cambia
+        self.continuous_switch = ctk.CTkSwitch(bottom_controls_frame, text="Modo continuo (traducción automática)",
+                                               command=self.toggle_continuous_mode)
+        self.continuous_switch.pack(fill=tk.X, padx=10, pady=5)
+
         # --- Contenedor principal para los paneles izquierdo y derecho ---
         main_content_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         main_content_frame.pack(fill=tk.BOTH, expand=True)
@@ -452,7 +3239,7 @@ class App(ctk.CTk):
         log_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=(5, 2.5), pady=5)
         ctk.CTkLabel(log_frame, text="Recuadro de seguimiento:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(10, 5))
         
-        self.log_box = ctk.CTkTextbox(log_frame, height=350, corner_radius=5, state=tk.DISABLED, wrap=tk.WORD)
+        self.log_box = ctk.CTkTextbox(log_frame, height=200, corner_radius=5, state=tk.DISABLED, wrap=tk.WORD)
         self.log_box.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         self.log_box.tag_config("success", foreground="green")
         self.log_box.tag_config("error", foreground="red")
@@ -460,6 +3247,12 @@ class App(ctk.CTk):
         self.log_box.tag_config("detected", foreground="cyan")
         self.log_box.tag_config("translated", foreground=self.text_color)
 
+        # Panel de rendimiento: latencias por etapa y contadores, refrescado periódicamente
+        ctk.CTkLabel(log_frame, text="Rendimiento:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(5, 0))
+        self.metrics_box = ctk.CTkTextbox(log_frame, height=130, corner_radius=5, state=tk.DISABLED, wrap=tk.NONE,
+                                          font=ctk.CTkFont(family="Courier", size=11))
+        self.metrics_box.pack(fill=tk.X, padx=10, pady=(5, 10))
+
         # --- Panel Derecho: Opciones de Traductor y Ventana ---
         right_panel_frame = ctk.CTkFrame(main_content_frame, fg_color="transparent")
         right_panel_frame.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=(2.5, 5), pady=5)
@@ -469,27 +3262,25 @@ class App(ctk.CTk):
         translator_frame.pack(fill=tk.X, padx=5, pady=5)
         ctk.CTkLabel(translator_frame, text="Seleccionar motor de traducción:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(10, 5))
         
-        translator_options = []
-        if GOOGLE_TRANSLATE_ENABLED:
-            translator_options.append("Google Translate")
-        if OLLAMA_ENABLED:
-            translator_options.append("Ollama")
+        translator_options = [name for name, backend in TRANSLATION_BACKENDS.items() if backend['available']]
 
         if not translator_options:
             translator_options.append("No hay traductores disponibles")
             self.log_message("No se encontraron traductores. Revisa las advertencias en la terminal.", "error")
         
-        self.translator_selector = ctk.CTkOptionMenu(translator_frame, values=translator_options)
+        self.translator_selector = ctk.CTkOptionMenu(translator_frame, values=translator_options,
+                                                     command=self.set_translator_choice)
         self.translator_selector.pack(fill=tk.X, padx=10, pady=10)
         self.translator_selector.set(translator_options[0] if translator_options else "")
-        
+        self.translator_choice = self.translator_selector.get() # Copia legible desde el hilo del modo continuo
+
         # Sección de Ventana y ROI
         window_frame = ctk.CTkFrame(right_panel_frame, corner_radius=8)
-        window_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        window_frame.pack(fill=tk.X, padx=5, pady=5)
         
         ctk.CTkLabel(window_frame, text="Seleccionar Ventana del Juego:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(10, 5))
 
-        self.window_list_frame = ctk.CTkScrollableFrame(window_frame, height=150)
+        self.window_list_frame = ctk.CTkScrollableFrame(window_frame, height=120)
         self.window_list_frame.pack(fill=tk.X, padx=10, pady=5)
         self.window_buttons = {}
         self.refresh_windows_list()
@@ -498,27 +3289,177 @@ class App(ctk.CTk):
         
         self.roi_label = ctk.CTkLabel(window_frame, text="ROIs activos: 0", font=ctk.CTkFont(size=12, weight="bold"))
         self.roi_label.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        # Opciones avanzadas de traducción, OCR y captura, en un panel con desplazamiento
+        advanced_frame = ctk.CTkScrollableFrame(right_panel_frame, corner_radius=8, label_text="Opciones avanzadas")
+        advanced_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self.streaming_switch = ctk.CTkSwitch(advanced_frame, text="Mostrar la traducción mientras se genera (Ollama)",
+                                              command=self.toggle_streaming)
+        self.streaming_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if self.stream_translations:
+            self.streaming_switch.select()
+
+        self.batch_switch = ctk.CTkSwitch(advanced_frame, text="Agrupar en una petición los textos de varias ROI",
+                                          command=self.toggle_batching)
+        self.batch_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if self.batch_translations:
+            self.batch_switch.select()
+
+        self.hedge_switch = ctk.CTkSwitch(advanced_frame, text="Si Ollama tarda, pedir también a Google y usar la primera respuesta",
+                                          command=self.toggle_hedging)
+        self.hedge_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if translation_engine.hedging_enabled:
+            self.hedge_switch.select()
+
+        self.stabilize_switch = ctk.CTkSwitch(advanced_frame, text="Esperar a que el texto termine de aparecer",
+                                              command=self.toggle_stabilize)
+        self.stabilize_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if self.stabilize_text:
+            self.stabilize_switch.select()
+
+        self.sentences_switch = ctk.CTkSwitch(advanced_frame, text="Traducir frase a frase (reutiliza las ya traducidas)",
+                                              command=self.toggle_split_sentences)
+        self.sentences_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if self.split_sentences:
+            self.sentences_switch.select()
+
+        ctk.CTkLabel(advanced_frame, text="Preprocesado OCR (ROI nuevas, clic derecho en un recuadro para cambiarlo):",
+                     font=ctk.CTkFont(size=12), wraplength=320).pack(fill=tk.X, padx=10, pady=(0, 2))
+        self.ocr_preset_selector = ctk.CTkOptionMenu(advanced_frame, values=list(OCR_PREPROCESS_PRESETS),
+                                                     command=self.set_default_ocr_preset)
+        self.ocr_preset_selector.set(self.ocr_preset)
+        self.ocr_preset_selector.pack(fill=tk.X, padx=10, pady=(0, 5))
+        ctk.CTkButton(advanced_frame, text="Guardar fotogramas para comparar", command=self.save_roi_frames).pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        ctk.CTkLabel(advanced_frame, text="Motor de OCR:", font=ctk.CTkFont(size=12)).pack(fill=tk.X, padx=10, pady=(0, 2))
+        engine_modes = [mode for mode, engines in OCR_ENGINE_MODES.items() if all(OCR_ENGINES[engine]['available'] for engine in engines)]
+        self.ocr_engine_selector = ctk.CTkOptionMenu(advanced_frame, values=engine_modes, command=self.set_ocr_engine_mode)
+        self.ocr_engine_selector.set(self.ocr_engine_mode)
+        self.ocr_engine_selector.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        self.process_ocr_switch = ctk.CTkSwitch(advanced_frame, text=f"OCR en {OCR_PROCESS_COUNT} proceso(s) separado(s) (más memoria)",
+                                                command=self.toggle_process_ocr)
+        self.process_ocr_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+
+        self.incremental_ocr_switch = ctk.CTkSwitch(advanced_frame, text="OCR incremental (solo reconoce las líneas que cambian)",
+                                                    command=self.toggle_incremental_ocr)
+        self.incremental_ocr_switch.pack(fill=tk.X, padx=10, pady=(0, 10))
+        if self.incremental_ocr:
+            self.incremental_ocr_switch.select()
+
+        ctk.CTkLabel(advanced_frame, text="Captura:", font=ctk.CTkFont(size=12)).pack(fill=tk.X, padx=10, pady=(0, 2))
+        self.capture_strategy_selector = ctk.CTkOptionMenu(advanced_frame, values=CAPTURE_STRATEGIES,
+                                                           command=self.set_capture_strategy)
+        self.capture_strategy_selector.set(self.capture_strategy)
+        self.capture_strategy_selector.pack(fill=tk.X, padx=10, pady=(0, 10))
         
-        # --- Controles inferiores ---
-        bottom_controls_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
-        bottom_controls_frame.pack(fill=tk.X, padx=5, pady=5)
+    def set_translator_choice(self, choice):
+        self.translator_choice = choice
 
-        # Botón para seleccionar el área de OCR
-        ctk.CTkButton(bottom_controls_frame, text="Seleccionar Área de OCR", command=self.on_select_roi_button).pack(fill=tk.X, padx=5, pady=2)
+    def toggle_streaming(self):
+        self.stream_translations = bool(self.streaming_switch.get())
 
-        # Botón para abrir la ventana de opciones de estilo (NUEVO)
-        ctk.CTkButton(bottom_controls_frame, text="Opciones de Estilo", command=self.open_style_options).pack(fill=tk.X, padx=5, pady=2)
+    def toggle_batching(self):
+        self.batch_translations = bool(self.batch_switch.get())
 
-        # Sección de Tecla de Acceso Rápido
-        hotkey_frame = ctk.CTkFrame(bottom_controls_frame, corner_radius=8)
-        hotkey_frame.pack(fill=tk.X, padx=5, pady=5)
-        ctk.CTkLabel(hotkey_frame, text="Tecla de acceso rápido:", font=ctk.CTkFont(size=12, weight="bold")).pack(fill=tk.X, padx=10, pady=(10, 5))
-        self.hotkey_entry = ctk.CTkEntry(hotkey_frame, placeholder_text="Ej: f1, ctrl+q, alt+s")
-        self.hotkey_entry.pack(fill=tk.X, padx=10, pady=2)
-        ctk.CTkButton(hotkey_frame, text="Establecer Tecla", command=self.set_hotkey).pack(fill=tk.X, padx=10, pady=10)
+    def toggle_incremental_ocr(self):
+        self.incremental_ocr = bool(self.incremental_ocr_switch.get())
 
+    def toggle_process_ocr(self):
+        """Arranca o detiene los procesos de OCR. Mientras arrancan, el OCR sigue en este proceso."""
+        if self.process_ocr_switch.get():
+            ocr_pool = OCRProcessPool()
+            self.pipeline.ocr_pool = ocr_pool
+
+            def start_task():
+                start = time.perf_counter()
+                try:
+                    ocr_pool.start()
+                except Exception as e:
+                    if self.pipeline.ocr_pool is not ocr_pool:
+                        return # Se desactivó mientras arrancaba
+                    self.pipeline.ocr_pool = None
+                    ocr_pool.close()
+                    self.log_message(f"No se pudieron arrancar los procesos de OCR: {e}", "error")
+                    self.run_in_ui(self.process_ocr_switch.deselect, wait=False)
+                    return
+                self.log_message(f"{ocr_pool.processes} proceso(s) de OCR listos en {time.perf_counter() - start:.2f} s.", "success")
+
+            self.log_message("Arrancando los procesos de OCR...", "info")
+            threading.Thread(target=start_task, name="arranque-ocr", daemon=True).start()
+        else:
+            ocr_pool = self.pipeline.ocr_pool
+            self.pipeline.ocr_pool = None
+            if ocr_pool is not None:
+                threading.Thread(target=ocr_pool.close, daemon=True).start()
+            self.log_message("OCR en procesos separados desactivado.", "info")
+
+    def toggle_stabilize(self):
+        self.stabilize_text = bool(self.stabilize_switch.get())
+
+    def toggle_split_sentences(self):
+        self.split_sentences = bool(self.sentences_switch.get())
+
+    def toggle_hedging(self):
+        translation_engine.hedging_enabled = bool(self.hedge_switch.get())
+
+    def set_default_ocr_preset(self, preset):
+        self.ocr_preset = preset
+        self.log_message(f"Preprocesado OCR para las ROI nuevas: {preset}", "info")
+
+    def set_ocr_engine_mode(self, engine_mode):
+        self.ocr_engine_mode = engine_mode
+        self.log_message(f"Motor de OCR: {engine_mode}", "info")
+
+    def set_capture_strategy(self, strategy):
+        self.capture_strategy = strategy
+        if strategy == CAPTURE_STRATEGY_WINDOW and sys.platform != "win32":
+            self.log_message("La captura de la ventana del juego solo existe en Windows; se ocultarán los recuadros solapados.", "info")
+        else:
+            self.log_message(f"Captura: {strategy}", "info")
+
+    def show_roi_options_menu(self, event, window_data):
+        """Menú contextual de un recuadro para elegir su preajuste de preprocesado."""
+        menu = tk.Menu(self, tearoff=0)
+        selected_preset = tk.StringVar(menu, value=window_data.get('ocr_preset', DEFAULT_OCR_PREPROCESS_PRESET))
+        for preset in OCR_PREPROCESS_PRESETS:
+            menu.add_radiobutton(label=f"Preprocesado: {preset}", variable=selected_preset, value=preset,
+                                 command=lambda p=preset: self.set_roi_ocr_preset(window_data, p))
+        try:
+            menu.tk_popup(event.x_root, event.y_root)
+        finally:
+            menu.grab_release()
+
+    def set_roi_ocr_preset(self, window_data, preset):
+        window_data['ocr_preset'] = preset
+        self.log_message(f"Preprocesado OCR de la ROI {window_data['id']}: {preset}", "info")
+
+    def save_roi_frames(self):
+        """Guarda la captura actual de cada ROI en CAPTURED_FRAMES_DIR, para comparar los preajustes."""
+        if not translation_windows:
+            show_warning("Error", "Debes seleccionar un área de captura primero.")
+            return
+
+        def save_task():
+            from PIL import Image
+
+            windows = list(translation_windows)
+            images, _ = self.pipeline.capture_windows(windows)
+            os.makedirs(CAPTURED_FRAMES_DIR, exist_ok=True)
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            saved = 0
+            for window_data, image in zip(windows, images):
+                if image is not None:
+                    Image.fromarray(np.ascontiguousarray(image)).save(os.path.join(CAPTURED_FRAMES_DIR, f"{timestamp}_roi{window_data['id']}.png"))
+                    saved += 1
+            self.log_message(f"{saved} fotogramas guardados en {CAPTURED_FRAMES_DIR}.", "success")
+
+        # En el hilo de captura, para no solaparse con las pasadas en curso
+        self.pipeline.run_on_capture_thread(save_task)
 
     def get_window_titles(self):
+        import pygetwindow as gw
         return [w.title for w in gw.getAllWindows() if w.title]
 
     def select_window_by_title(self, title):
@@ -561,6 +3502,7 @@ class App(ctk.CTk):
         selected_title = self.selected_window_title
         if selected_title:
             try:
+                import pygetwindow as gw
                 selected_window = gw.getWindowsWithTitle(selected_title)[0]
                 select_roi(self)
             except IndexError:
@@ -576,6 +3518,7 @@ class App(ctk.CTk):
             self.stop_hotkey()
             self.hotkey = new_hotkey
             try:
+                import keyboard
                 keyboard.add_hotkey(self.hotkey, self.start_translation_thread)
                 self.log_message(f"Tecla '{self.hotkey}' configurada. Pulsa para traducir.", "success")
             except ValueError:
@@ -588,6 +3531,7 @@ class App(ctk.CTk):
 
     def stop_hotkey(self):
         if self.hotkey:
+            import keyboard
             keyboard.unhook_all_hotkeys()
             self.log_message("Hotkey desvinculada.", "info")
             self.hotkey = None
@@ -596,23 +3540,15 @@ class App(ctk.CTk):
         global roi_coords, translation_windows
         
         if roi_coords:
-            def on_close_overlay(closed_root):
-                global translation_windows, last_extracted_text_per_roi
-                translation_windows = [w for w in translation_windows if w['root'] is not closed_root]
-                
-                for key in list(last_extracted_text_per_roi.keys()):
-                    if key not in [w['id'] for w in translation_windows]:
-                        del last_extracted_text_per_roi[key]
-
-                self.roi_label.configure(text=f"ROIs activos: {len(translation_windows)}")
-                self.log_message(f"Recuadro de traducción cerrado. ROIs activos: {len(translation_windows)}", "info")
-
-            new_id = len(translation_windows)
+            # Los identificadores no se reutilizan: len(translation_windows) repetiría
+            # el de un recuadro vivo tras cerrar otro anterior
+            new_id = self.next_roi_id
+            self.next_roi_id += 1
             new_root, new_canvas, new_text_id, width, height, frame_header, frame_content = create_overlay_window(
-                roi_coords, on_close_overlay, initial_text="Esperando traducción...",
+                roi_coords, self.on_close_overlay, initial_text="Esperando traducción...",
                 opacity=self.opacity, text_color=self.text_color, bg_color=self.bg_color
             )
-            translation_windows.append({
+            window_data = {
                 'id': new_id,
                 'root': new_root,
                 'canvas': new_canvas,
@@ -621,8 +3557,16 @@ class App(ctk.CTk):
                 'width': width,
                 'height': height,
                 'frame_header': frame_header,
-                'frame_content': frame_content
-            })
+                'frame_content': frame_content,
+                'capture_interval': CONTINUOUS_INTERVAL_S,
+                'ocr_preset': self.ocr_preset,
+                'unmapped': threading.Event()
+            }
+            translation_windows.append(window_data)
+            translation_windows_by_id[new_id] = window_data
+            for sequence in ("<Map>", "<Unmap>"):
+                new_root.bind(sequence, lambda event, wd=window_data: self.on_overlay_map_event(event, wd), add="+")
+            frame_header.bind("<Button-3>", lambda event: self.show_roi_options_menu(event, window_data))
             last_extracted_text_per_roi[new_id] = ""
 
             self.roi_label.configure(text=f"ROIs activos: {len(translation_windows)}")
@@ -630,134 +3574,267 @@ class App(ctk.CTk):
         else:
             self.log_message("No se pudo crear el recuadro, no hay coordenadas ROI.", "error")
 
+    def on_close_overlay(self, closed_root):
+        global translation_windows
+        closed_ids = [w['id'] for w in translation_windows if w['root'] is closed_root]
+        translation_windows = [w for w in translation_windows if w['root'] is not closed_root]
+
+        for roi_id in closed_ids:
+            translation_windows_by_id.pop(roi_id, None)
+            last_extracted_text_per_roi.pop(roi_id, None)
+            last_frame_signature_per_roi.pop(roi_id, None)
+            last_bounding_boxes_per_roi.pop(roi_id, None)
+            self.pipeline.incremental_ocr_states.pop(roi_id, None)
+            self.pipeline.scheduler.forget(roi_id)
+
+        self.roi_label.configure(text=f"ROIs activos: {len(translation_windows)}")
+        self.log_message(f"Recuadro de traducción cerrado. ROIs activos: {len(translation_windows)}", "info")
+
     def start_translation_thread(self):
-        global translation_running, translation_windows
+        """
+        Lanza una pasada sobre todas las ROI. Si aún hay otra en curso no se
+        espera a que termine: la nueva captura sustituye a la pendiente y el
+        trabajo de los fotogramas anteriores se descarta (ver RoiScheduler).
+        Se llama desde el hilo del gancho de teclado, así que no toca los widgets.
+        """
+        global translation_windows
         
         if not translation_windows:
             self.log_message("Por favor, selecciona un área de OCR primero.", "error")
-            show_warning("Error", "Debes seleccionar un área de captura primero.")
+            self.warn("Error", "Debes seleccionar un área de captura primero.")
             return
         
-        translator_choice = self.translator_selector.get()
+        translator_choice = self.translator_choice
         if translator_choice == "Google Translate" and not GOOGLE_TRANSLATE_ENABLED:
-            show_warning("Error", "El traductor de Google no está disponible. Revisa la terminal para más detalles.")
+            self.warn("Error", "El traductor de Google no está disponible. Revisa la terminal para más detalles.")
             return
         if translator_choice == "Ollama" and not OLLAMA_ENABLED:
-            show_warning("Error", "El traductor de Ollama no está disponible. Revisa la terminal para más detalles.")
+            self.warn("Error", "El traductor de Ollama no está disponible. Revisa la terminal para más detalles.")
             return
 
-        if not translation_running:
-            translation_running = True
-            self.log_message(f"Iniciando tarea de traducción con {translator_choice} para {len(translation_windows)} áreas...", "info")
-            threading.Thread(target=self.translation_task, daemon=True).start()
-            if self.after_id is None:
-                self.check_translation_queue()
+        if not self.ocr_ready.is_set():
+            self.log_message("El modelo de OCR aún se está cargando; la traducción empezará cuando esté listo.", "info")
+        self.log_message(f"Iniciando tarea de traducción con {translator_choice} para {len(translation_windows)} áreas...", "info")
+        self.pipeline.submit(TranslationPass(list(translation_windows), translator_choice,
+                                             batch=self.batch_translations, on_done=self.on_translation_pass_done))
+
+    def toggle_continuous_mode(self):
+        global continuous_mode_running
+
+        if self.continuous_switch.get():
+            if not translation_windows:
+                self.continuous_switch.deselect()
+                self.log_message("Por favor, selecciona un área de OCR primero.", "error")
+                show_warning("Error", "Debes seleccionar un área de captura primero.")
+                return
+            if not continuous_mode_running:
+                continuous_mode_running = True
+                self.log_message(f"Modo continuo activado ({len(translation_windows)} áreas).", "success")
+                threading.Thread(target=self.continuous_task, daemon=True).start()
         else:
-            self.log_message("Ya hay una traducción en curso. Por favor, espera.", "info")
-
-    def translation_task(self):
-        global translation_running, translation_windows, last_extracted_text_per_roi
-        
-        current_translator = self.translator_selector.get()
-
-        # Ocultar temporalmente los recuadros para que no interfieran con la captura de pantalla
-        hidden_roots = []
+            continuous_mode_running = False
+            self.log_message("Modo continuo desactivado.", "info")
+
+    def continuous_task(self):
+        """
+        Bucle del modo continuo. Cada ROI tiene su propio temporizador; en cada
+        vencimiento se captura y solo se lanza el OCR si el fotograma ha cambiado.
+        Las ROI que aún esperan su captura anterior no se vuelven a pedir.
+        """
+        global continuous_mode_running
+
+        next_capture_per_roi = {}
+        while continuous_mode_running:
+            if not translation_windows:
+                continuous_mode_running = False
+                self.log_message("No hay recuadros activos, deteniendo el modo continuo.", "info")
+                break
+
+            now = time.monotonic()
+            due_windows = [w for w in list(translation_windows) if next_capture_per_roi.get(w['id'], 0) <= now
+                           and not self.pipeline.scheduler.has_pending_capture(w['id'])]
+
+            if due_windows:
+                for window_data in due_windows:
+                    next_capture_per_roi[window_data['id']] = now + window_data.get('capture_interval', CONTINUOUS_INTERVAL_S)
+                self.pipeline.submit(TranslationPass(due_windows, self.translator_choice,
+                                                     only_if_frame_changed=True, activate_window=False,
+                                                     batch=self.batch_translations, on_done=self.on_translation_pass_done))
+
+            pending = [next_capture_per_roi.get(w['id'], now) for w in list(translation_windows)]
+            wait = (min(pending) if pending else now + CONTINUOUS_INTERVAL_S) - time.monotonic()
+            time.sleep(min(CONTINUOUS_INTERVAL_S, max(0.02, wait)))
+
+    def on_translation_pass_done(self, translation_pass):
+        if translation_pass.translated_any:
+            self.log_message(get_translation_cache().stats_summary(), "info")
+
+    def hide_overlays(self, capture_boxes=None):
+        """
+        Oculta los recuadros de traducción que se solapan con capture_boxes (todos
+        si es None) antes de capturar la pantalla, y espera a que el sistema de
+        ventanas confirme que se han ocultado. Se llama desde los hilos de trabajo:
+        el ocultado en sí se hace en el hilo de la interfaz.
+        """
+        hidden_windows = self.run_in_ui(lambda: self.withdraw_overlays(capture_boxes)) or []
+
+        deadline = time.monotonic() + OVERLAY_UNMAP_TIMEOUT_S
+        for window_data in hidden_windows:
+            window_data['unmapped'].wait(max(0.0, deadline - time.monotonic()))
+        if hidden_windows:
+            time.sleep(OVERLAY_UNMAP_SETTLE_S)
+        return [window_data['root'] for window_data in hidden_windows]
+
+    def withdraw_overlays(self, capture_boxes=None):
+        hidden_windows = []
         for window_data in translation_windows:
             root = window_data['root']
-            if root and root.winfo_exists():
-                root.withdraw()
-                hidden_roots.append(root)
-
-        # Esperar un momento para que las ventanas se oculten completamente
-        time.sleep(0.1)
-
-        try:
-            if selected_window:
-                try:
-                    selected_window.activate()
-                except Exception as e:
-                    self.log_message(f"Error al activar la ventana: {e}", "error")
-
-            for window_data in translation_windows:
-                roi_id = window_data['id']
-                roi_coords = window_data['roi_coords']
-                
-                preprocessed_image = capture_and_preprocess(roi_coords)
-
-                if preprocessed_image is not None:
-                    extracted_text, bounding_boxes = perform_ocr(preprocessed_image)
-
-                    if extracted_text and extracted_text != last_extracted_text_per_roi.get(roi_id, ""):
-                        self.log_message(f"Texto detectado en ROI {roi_id}: {extracted_text}", "detected")
-                        last_extracted_text_per_roi[roi_id] = extracted_text
-                        
-                        if current_translator == "Google Translate":
-                            translated_text = translate_with_google_translate(extracted_text)
-                        elif current_translator == "Ollama":
-                            translated_text = translate_with_ollama(extracted_text)
-                        else:
-                            translated_text = "[Error: Traductor no seleccionado]"
-                        
-                        font_size = calculate_font_size_from_bbox(bounding_boxes)
-                        
-                        translation_queue.put({'id': roi_id, 'text': translated_text, 'font_size': font_size, 'text_color': self.text_color})
-                        self.log_message(f"Traducción para ROI {roi_id}: {translated_text}", "translated")
-                    elif not extracted_text:
-                        if last_extracted_text_per_roi.get(roi_id, "") != "":
-                             last_extracted_text_per_roi[roi_id] = ""
-                             translation_queue.put({'id': roi_id, 'text': "", 'font_size': 10, 'text_color': self.text_color})
-                             self.log_message(f"No se detectó texto en ROI {roi_id}.", "info")
+            if not (root and root.winfo_exists() and root.winfo_ismapped()):
+                continue
+            if capture_boxes is not None:
+                # Posición real del recuadro: el usuario puede haberlo arrastrado
+                x, y = root.winfo_rootx(), root.winfo_rooty()
+                overlay_box = (x, y, x + root.winfo_width(), y + root.winfo_height())
+                if not any(rects_overlap(overlay_box, box) for box in capture_boxes):
+                    continue
+            window_data['unmapped'].clear()
+            root.withdraw()
+            hidden_windows.append(window_data)
+        return hidden_windows
+
+    def on_overlay_map_event(self, event, window_data):
+        """Sigue si el recuadro está visible; hide_overlays espera al <Unmap>."""
+        if event.widget is not window_data['root']:
+            return
+        if event.type == tk.EventType.Unmap:
+            window_data['unmapped'].set()
+        else:
+            window_data['unmapped'].clear()
 
-        except Exception as e:
-            self.log_message(f"Error en el hilo de traducción: {e}", "error")
-            translation_queue.put({'id': -1, 'text': "[ERROR en el hilo de traducción]", 'font_size': 10, 'text_color': self.text_color})
-        finally:
-            translation_running = False
+    def restore_overlays(self, hidden_roots):
+        def deiconify_overlays():
             for root in hidden_roots:
                 if root and root.winfo_exists():
                     root.deiconify()
 
-    def check_translation_queue(self):
-        global translation_windows
-        try:
-            while not translation_queue.empty():
-                message = translation_queue.get_nowait()
-                roi_id = message['id']
-                translated_text = message['text']
-                font_size = message['font_size']
-                text_color = message['text_color']
-
-
-                window_to_update = next((w for w in translation_windows if w['id'] == roi_id), None)
-
-                if window_to_update and window_to_update['root'] and window_to_update['root'].winfo_exists():
-                    update_overlay_window(window_to_update['canvas'], window_to_update['text_id'], translated_text,
-                                          window_to_update['width'], window_to_update['height'], font_size, text_color)
-                elif window_to_update:
-                    self.log_message(f"El recuadro {roi_id} no existe. Eliminando de la lista.", "error")
-                    self.on_close_overlay(window_to_update['root'])
-        except queue.Empty:
-            pass
-        
-        if translation_windows:
-            self.after_id = self.after(100, self.check_translation_queue)
+        if hidden_roots:
+            self.run_in_ui(deiconify_overlays, wait=False)
+
+    def process_ui_queue(self):
+        """
+        Vacía la cola de mensajes de los hilos de trabajo y se vuelve a programar.
+        Mientras llegan mensajes se repite cada UI_POLL_BUSY_MS; sin actividad el
+        intervalo se duplica hasta UI_POLL_IDLE_MS. De cada recuadro solo se dibuja
+        el texto más reciente.
+        """
+        if translation_queue.empty():
+            self.ui_poll_ms = min(self.ui_poll_ms * 2, UI_POLL_IDLE_MS)
         else:
-            if self.after_id:
-                self.after_cancel(self.after_id)
-                self.after_id = None
-                self.log_message("No hay recuadros activos, deteniendo el chequeo de la cola.", "info")
+            self.ui_poll_ms = UI_POLL_BUSY_MS
+        self.ui_poll_id = self.after(self.ui_poll_ms, self.process_ui_queue)
+        latest_per_roi = {}
+        while True:
+            try:
+                message = translation_queue.get_nowait()
+            except queue.Empty:
+                break
+
+            kind = message.get('kind')
+            if kind == 'overlay':
+                if message['id'] in latest_per_roi:
+                    performance_metrics.increment('ui_merged')
+                latest_per_roi[message['id']] = message
+            elif kind == 'log':
+                self.queue_log_line(message['line'], message['message_type'])
+            elif kind == 'call':
+                try:
+                    message['result'] = message['func']()
+                except Exception as e:
+                    self.log_message(f"Error en la interfaz: {e}", "error")
+                finally:
+                    message['done'].set()
+
+        for roi_id, message in latest_per_roi.items():
+            window_to_update = translation_windows_by_id.get(roi_id)
+            if window_to_update is None:
+                continue
+            if not (window_to_update['root'] and window_to_update['root'].winfo_exists()):
+                self.log_message(f"El recuadro {roi_id} no existe. Eliminando de la lista.", "error")
+                self.on_close_overlay(window_to_update['root'])
+                continue
+
+            render_start = time.perf_counter()
+            if message.get('queued_at') is not None:
+                performance_metrics.record('queue_wait', render_start - message['queued_at'], roi_id=roi_id)
+            update_overlay_window(window_to_update['canvas'], window_to_update['text_id'], message['text'],
+                                  window_to_update['width'], window_to_update['height'],
+                                  message['font_size'], message['text_color'])
+            render_end = time.perf_counter()
+            performance_metrics.record('render', render_end - render_start, roi_id=roi_id)
+            if message.get('started_at') is not None:
+                performance_metrics.record('end_to_end', render_end - message['started_at'], roi_id=roi_id)
 
     def on_close(self):
+        global continuous_mode_running
+        continuous_mode_running = False
+        if self.ui_poll_id is not None:
+            self.after_cancel(self.ui_poll_id)
+            self.ui_poll_id = None
         self.stop_hotkey()
         global ollama_process
         if ollama_process and ollama_process.poll() is None:
             ollama_process.terminate()
             print("Servidor de Ollama terminado.")
+        if translation_cache is not None:
+            translation_cache.close()
+        if ocr_result_cache is not None:
+            ocr_result_cache.close()
+        if self.log_listener is not None:
+            self.log_listener.stop()
+        if self.pipeline.ocr_pool is not None:
+            self.pipeline.ocr_pool.close()
         for window_data in translation_windows:
             if window_data['root'] and window_data['root'].winfo_exists():
                 window_data['root'].destroy()
         self.destroy()
 
 if __name__ == "__main__":
-    app = App()
-    app.mainloop()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Traductor en tiempo real de texto de juegos mediante OCR.")
+    parser.add_argument("--comparar-preprocesado", metavar="CARPETA",
+                        help="Compara la latencia y la precisión del OCR de cada preajuste de preprocesado "
+                             "sobre las capturas de CARPETA y termina.")
+    parser.add_argument("--lote", metavar="RUTA",
+                        help="Traduce sin interfaz una carpeta de capturas o un .txt con el guion (una línea por texto), "
+                             "guarda los resultados y rellena la caché de traducciones.")
+    parser.add_argument("--salida", default=BATCH_OUTPUT_PATH, help="Archivo JSON con los resultados del lote.")
+    parser.add_argument("--motor", default="Ollama", choices=list(TRANSLATION_BACKENDS),
+                        help="Motor de traducción del lote.")
+    parser.add_argument("--procesos", type=int, default=OCR_PROCESS_COUNT, help="Procesos de OCR del lote.")
+    parser.add_argument("--roi", metavar="X1,Y1,X2,Y2", help="Recorta las capturas del lote a esta zona antes del OCR.")
+    parser.add_argument("--preprocesado", default=DEFAULT_OCR_PREPROCESS_PRESET, choices=list(OCR_PREPROCESS_PRESETS),
+                        help="Preajuste de preprocesado del OCR del lote.")
+    parser.add_argument("--motor-ocr", default=DEFAULT_OCR_ENGINE_MODE, choices=list(OCR_ENGINE_MODES),
+                        help="Motores de OCR del lote.")
+    args = parser.parse_args()
+
+    for option, path in (("--lote", args.lote), ("--comparar-preprocesado", args.comparar_preprocesado)):
+        if path and not os.path.exists(path):
+            print(f"ERROR: La ruta '{path}' indicada en {option} no existe.")
+            sys.exit(1)
+    if not EASYOCR_ENABLED:
+        report_missing_easyocr()
+        sys.exit()
+    if args.comparar_preprocesado:
+        print_ocr_preset_comparison(compare_ocr_presets(load_frames_from_directory(args.comparar_preprocesado)))
+    elif args.lote:
+        roi = tuple(int(value) for value in args.roi.split(",")) if args.roi else None
+        try:
+            run_batch_translation(args.lote, args.motor, output_path=args.salida, roi=roi,
+                                  preset=args.preprocesado, processes=max(1, args.procesos),
+                                  engine_mode=args.motor_ocr)
+        finally:
+            if translation_cache is not None:
+                translation_cache.close()
+    else:
+        app = App()
+        app.mainloop()
\ No newline at end of file
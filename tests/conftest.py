@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# El programa y el banco de pruebas viven en la carpeta del script, no en un paquete
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Nueva carpeta (2)"))
+
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+@pytest.fixture
+def ocr_texts(monkeypatch):
+    """Último texto reconocido por ROI, vacío para cada prueba."""
+    texts = {}
+    monkeypatch.setattr(traductor, "last_extracted_text_per_roi", texts)
+    return texts
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import benchmark_traductor
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+class RawStreamHandler(benchmark_traductor.StubOllamaHandler):
+    """Envía tal cual los trozos de server.raw_chunks, para cortar las líneas donde haga falta."""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for body in self.server.raw_chunks:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(body), body))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = benchmark_traductor.StubOllamaServer(first_token_latency=0, token_latency=0, prompt_token_latency=0)
+    server.start()
+    monkeypatch.setattr(traductor, "OLLAMA_BASE_URL", server.base_url)
+    monkeypatch.setattr(traductor, "OLLAMA_API_URL", f"{server.base_url}/api/generate")
+    monkeypatch.setattr(traductor, "OLLAMA_STREAM_UPDATE_INTERVAL_S", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def raw_server(stub_server):
+    stub_server.RequestHandlerClass = RawStreamHandler
+    stub_server.raw_chunks = []
+    return stub_server
+
+
+def ndjson(*objects):
+    return b"".join((json.dumps(data) + "\n").encode("utf-8") for data in objects)
+
+
+def test_stream_returns_full_text_and_growing_partials(stub_server):
+    partials = []
+    text = traductor.read_ollama_stream({"model": "m", "prompt": "uno dos tres", "system": "s", "stream": True},
+                                        partials.append)
+    assert text.split() == ["trad_uno", "trad_dos", "trad_tres"]
+    assert partials
+    for previous, current in zip(partials, partials[1:]):
+        assert current.startswith(previous)
+    assert text.startswith(partials[-1])
+
+
+def test_lines_split_across_chunks_are_joined(raw_server):
+    body = ndjson({"response": "Hola", "done": False}, {"response": " mundo", "done": False},
+                  {"response": "", "done": True})
+    raw_server.raw_chunks = [body[:10], body[10:31], body[31:]]
+    assert traductor.read_ollama_stream({"prompt": "x"}, lambda partial: None) == "Hola mundo"
+
+
+def test_stream_stops_at_done(raw_server):
+    raw_server.raw_chunks = [ndjson({"response": "fin", "done": True}, {"response": " de más", "done": False})]
+    assert traductor.read_ollama_stream({"prompt": "x"}, lambda partial: None) == "fin"
+
+
+def test_empty_lines_are_skipped(raw_server):
+    raw_server.raw_chunks = [b"\n", ndjson({"response": "a", "done": False}), b"\n\n", ndjson({"done": True})]
+    assert traductor.read_ollama_stream({"prompt": "x"}, lambda partial: None) == "a"
+
+
+def test_malformed_json_raises(raw_server):
+    raw_server.raw_chunks = [ndjson({"response": "a", "done": False}), b"{\"response\": \"b\"\n"]
+    with pytest.raises(ValueError):
+        traductor.read_ollama_stream({"prompt": "x"}, lambda partial: None)
+
+
+def test_error_object_raises(raw_server):
+    raw_server.raw_chunks = [ndjson({"error": "model not found"})]
+    with pytest.raises(RuntimeError, match="model not found"):
+        traductor.read_ollama_stream({"prompt": "x"}, lambda partial: None)
@@ -0,0 +1,57 @@
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+def test_newer_request_wins_the_capture():
+    scheduler = traductor.RoiScheduler()
+    first = scheduler.request_capture(1)
+    second = scheduler.request_capture(1)
+    assert scheduler.has_pending_capture(1)
+    assert not scheduler.start_capture(1, first)
+    assert scheduler.start_capture(1, second)
+    assert not scheduler.has_pending_capture(1)
+
+
+def test_requests_are_per_roi():
+    scheduler = traductor.RoiScheduler()
+    request_a = scheduler.request_capture(1)
+    request_b = scheduler.request_capture(2)
+    assert scheduler.start_capture(1, request_a)
+    assert scheduler.start_capture(2, request_b)
+
+
+def test_stale_frame_is_not_committed(ocr_texts):
+    scheduler = traductor.RoiScheduler()
+    old_frame = scheduler.new_frame(1)
+    new_frame = scheduler.new_frame(1)
+    assert not scheduler.is_current_frame(1, old_frame)
+    assert scheduler.commit_text(1, old_frame, "Hello there") is None
+    assert ocr_texts == {}
+    assert scheduler.commit_text(1, new_frame, "Hello there") == 1
+
+
+def test_line_generations(ocr_texts):
+    scheduler = traductor.RoiScheduler()
+    first_line = scheduler.commit_text(1, scheduler.new_frame(1), "Hello there")
+    assert first_line == 1
+    # La misma línea con ruido del OCR no es una línea nueva
+    assert scheduler.commit_text(1, scheduler.new_frame(1), "HeIlo there.") == 0
+    second_line = scheduler.commit_text(1, scheduler.new_frame(1), "Goodbye")
+    assert second_line == 2
+    assert not scheduler.is_current_line(1, first_line)
+    assert scheduler.is_current_line(1, second_line)
+    # Vaciarse cuenta como cambio; seguir vacía, no
+    assert scheduler.commit_text(1, scheduler.new_frame(1), "") == 3
+    assert scheduler.commit_text(1, scheduler.new_frame(1), "") == 0
+    assert ocr_texts == {1: ""}
+
+
+def test_forget_resets_the_roi(ocr_texts):
+    scheduler = traductor.RoiScheduler()
+    scheduler.request_capture(1)
+    frame = scheduler.new_frame(1)
+    line = scheduler.commit_text(1, frame, "Hello")
+    scheduler.forget(1)
+    assert not scheduler.is_current_frame(1, frame)
+    assert not scheduler.is_current_line(1, line)
+    assert not scheduler.has_pending_capture(1)
+    assert scheduler.request_capture(1) == 1
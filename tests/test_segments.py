@@ -0,0 +1,43 @@
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+def test_numbered_segments_round_trip():
+    texts = ["Hello  there", "How are\nyou?", "Bye"]
+    block = traductor.build_numbered_segments(texts)
+    assert block == "[1] Hello there\n[2] How are you?\n[3] Bye"
+    assert traductor.split_numbered_segments(block, 3) == ["Hello there", "How are you?", "Bye"]
+
+
+def test_split_numbered_segments_ignores_chatter_and_order():
+    response = "Aquí tienes la traducción:\n[2] Adiós\n  [1]  Hola \n\nNota: he mantenido los nombres."
+    assert traductor.split_numbered_segments(response, 2) == ["Hola", "Adiós"]
+
+
+def test_split_numbered_segments_keeps_first_duplicate_and_ignores_out_of_range():
+    response = "[1] Hola\n[1] Otra\n[2] Adiós\n[3] Sobra"
+    assert traductor.split_numbered_segments(response, 2) == ["Hola", "Adiós"]
+
+
+def test_split_numbered_segments_rejects_missing_or_empty():
+    assert traductor.split_numbered_segments("[1] Hola", 2) is None
+    assert traductor.split_numbered_segments("[1] Hola\n[2]   ", 2) is None
+    assert traductor.split_numbered_segments("", 1) is None
+
+
+def test_split_sentences_on_final_punctuation():
+    assert traductor.split_sentences("Hello there. How are you? Fine!") == ["Hello there.", "How are you?", "Fine!"]
+
+
+def test_split_sentences_keeps_abbreviations_initials_and_ellipsis():
+    assert traductor.split_sentences("Mr. Smith is here. J. Doe left.") == ["Mr. Smith is here.", "J. Doe left."]
+    assert traductor.split_sentences("Well... thanks. Bye.") == ["Well... thanks.", "Bye."]
+    assert traductor.split_sentences("It costs 3.50 now. ok then.") == ["It costs 3.50 now. ok then."]
+
+
+def test_split_sentences_japanese_without_spaces():
+    assert traductor.split_sentences("こんにちは。元気？はい！") == ["こんにちは。", "元気？", "はい！"]
+
+
+def test_split_sentences_empty_and_single():
+    assert traductor.split_sentences("   ") == []
+    assert traductor.split_sentences("No punctuation here") == ["No punctuation here"]
@@ -0,0 +1,63 @@
+import pytest
+
+import vn_realtime_translator_overlay_fixed as traductor
+
+
+@pytest.mark.parametrize("text, previous", [
+    ("Are you going to the park now?", "Are you going to the bank now?"),
+    ("You have 10 minutes", "You have 15 minutes"),
+    ("Meet me at 7 tonight", "Meet me at 8 tonight"),
+    ("I love him.", "I love her."),
+    ("See you at 10", "See you at lo"),
+    ("Hello", "Hello there"),
+    ("Hello there", "there"),
+])
+def test_real_changes_are_different_lines(text, previous):
+    assert not traductor.is_same_line(text, previous)
+
+
+@pytest.mark.parametrize("text, previous", [
+    ("I love him.", "l love him"),
+    ("| love him!", "I love him."),
+    ("G0od morning", "Good morning"),
+    ("The modern world", "The modem world"),
+    ("Hello,  world", "hello world"),
+    ("Floor 10.", "Floor 10"),
+])
+def test_ocr_noise_is_the_same_line(text, previous):
+    assert traductor.is_same_line(text, previous)
+
+
+def test_normalize_keeps_word_boundaries_and_numbers():
+    assert traductor.normalize_ocr_text("  Wait... 10 MINUTES, Ok?") == "walt 10 mlnutes ok"
+    assert traductor.normalize_ocr_text("...") == ""
+
+
+def test_normalized_texts_match_is_exact_on_canonical_forms():
+    assert traductor.normalized_texts_match("hello world", "hello world")
+    assert not traductor.normalized_texts_match("hello world", "hello wor1d")
+
+
+def test_text_growing():
+    assert traductor.is_text_growing("Welcome back to the", "Welcome back to t")
+    assert not traductor.is_text_growing("Welcome back", "Welcome back")
+    assert not traductor.is_text_growing("Goodbye for now", "Welcome")
+
+
+def test_fuzzy_memory_serves_only_equivalent_lines():
+    memory = traductor.FuzzyTranslationMemory()
+    namespace = ("es", "Ollama", "mistral")
+    memory.add(namespace, "I love him.", "Le quiero.")
+    assert memory.lookup(namespace, "l love him") == "Le quiero."
+    assert memory.lookup(namespace, "I love her.") is None
+    assert memory.lookup(("es", "Google Translate", ""), "I love him.") is None
+
+
+def test_fuzzy_memory_evicts_least_recently_used():
+    memory = traductor.FuzzyTranslationMemory(max_entries=2)
+    memory.add("ns", "first line", "1")
+    memory.add("ns", "second line", "2")
+    assert memory.lookup("ns", "first line") == "1"
+    memory.add("ns", "third line", "3")
+    assert memory.lookup("ns", "second line") is None
+    assert memory.lookup("ns", "first line") == "1"